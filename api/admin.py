@@ -1,31 +1,92 @@
 from django.contrib import admin
 from django.contrib.admin import ModelAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
 from api.models import Answer, Question
 
+# Ниже этого числа строк точный COUNT(*) достаточно дешев
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор с оценкой числа строк для PostgreSQL.
+
+    Для списка без фильтров и поиска вместо COUNT(*) по всей таблице берет
+    оценку планировщика (pg_class.reltuples, с учетом секций). Оценка
+    используется только для больших таблиц, для остальных и для
+    отфильтрованных списков считается точное число.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        model = queryset.model
+        unfiltered = queryset.query.where == model._default_manager.all().query.where
+        if unfiltered and connections[queryset.db].vendor == "postgresql":
+            estimate = self._estimate(queryset.db, model._meta.db_table)
+            if estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def _estimate(using, table):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint "
+                "FROM pg_class c WHERE c.oid = %s::regclass OR c.oid IN "
+                "(SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+                [table, table],
+            )
+            return cursor.fetchone()[0]
+
+
+class FastChangeListAdmin(ModelAdmin):
+    """
+    Базовый административный интерфейс для больших таблиц.
+
+    Навигация по индексированному created_at вместо list_filter (который
+    строит боковую панель через SELECT DISTINCT по всей таблице), оценка
+    числа строк вместо COUNT(*) и полнотекстовый поиск по GIN-индексу на
+    PostgreSQL вместо LIKE.
+    """
+
+    date_hierarchy = "created_at"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_fields = ("text",)
+    ordering = ("-id",)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or connections[queryset.db].vendor != "postgresql":
+            return super().get_search_results(request, queryset, search_term)
+
+        # импорт здесь: модуль требует драйвер PostgreSQL
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        queryset = queryset.annotate(
+            search=SearchVector("text", config="simple")
+        ).filter(search=SearchQuery(search_term, config="simple"))
+        return queryset, False
+
 
 @admin.register(Question)
-class QuestionAdmin(ModelAdmin):
+class QuestionAdmin(FastChangeListAdmin):
     """
     Административный интерфейс для модели Question.
     """
 
-    list_filter = (
-        "id",
-        "text",
-        "created_at",
-    )
+    list_display = ("id", "__str__", "created_at")
 
 
 @admin.register(Answer)
-class AnswerAdmin(ModelAdmin):
+class AnswerAdmin(FastChangeListAdmin):
     """
     Административный интерфейс для модели Answer.
     """
 
-    list_filter = (
-        "id",
-        "question",
-        "user_id",
-        "created_at",
-    )
+    list_display = ("id", "question", "user_id", "created_at")
+    list_select_related = ("question",)
+    autocomplete_fields = ("question",)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from api.ingest import start_flusher
+        from api.metrics import mark_ready
+
+        mark_ready()
+        start_flusher()
@@ -0,0 +1,52 @@
+import random
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_read_database: ContextVar[Optional[str]] = ContextVar("read_database", default=None)
+
+
+def choose_replica() -> str:
+    """
+    Выбирает реплику для чтения с учетом весов из DATABASE_REPLICAS.
+
+    Если реплики не настроены, возвращает основную базу.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+    return random.choices(list(replicas), weights=list(replicas.values()))[0]
+
+
+def use_read_database(alias: str) -> Any:
+    """Закрепляет базу для чтения в текущем контексте, возвращает токен для сброса"""
+    return _read_database.set(alias)
+
+
+def reset_read_database(token: Any) -> None:
+    """Снимает закрепление базы для чтения"""
+    _read_database.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Маршрутизатор запросов к базам данных.
+
+    Запись всегда идет в основную базу. Чтение идет в базу, закрепленную за
+    текущим запросом (см. PrimaryPinningMiddleware), а вне HTTP-запроса -
+    в реплику, выбранную с учетом весов.
+    """
+
+    def db_for_read(self, model: Any, **hints: Any) -> str:
+        return _read_database.get() or choose_replica()
+
+    def db_for_write(self, model: Any, **hints: Any) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> bool:
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> bool:
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,479 @@
+"""
+Поиск почти одинаковых вопросов (MinHash + LSH).
+
+Текст вопроса нормализуется и разбивается на символьные триграммы. По
+триграммам строится MinHash-сигнатура из NUM_PERM значений: доля совпавших
+значений двух сигнатур оценивает коэффициент Жаккара их наборов триграмм.
+Сигнатура делится на BANDS полос по ROWS значений; вопросы, у которых
+совпала хотя бы одна полоса, становятся кандидатами и сравниваются по полной
+сигнатуре. При 16 полосах по 4 значения вопрос со сходством 0.7 становится
+кандидатом с вероятностью около 0.99, со сходством 0.3 - около 0.12.
+
+Индекс хранится в файле, который открывается через mmap: идентификаторы,
+сигнатуры и по каждой полосе отсортированный массив (хеш полосы << 32 |
+номер строки), в котором кандидаты ищутся двоичным поиском. Поэтому память
+процесса и время проверки почти не зависят от числа вопросов, а перезапуск
+не требует пересчета сигнатур. Вопросы, добавленные после записи файла,
+хранятся в памяти: перед каждой проверкой индекс добирает из базы вопросы,
+которых в нем еще нет, что согласует индексы разных процессов.
+
+Фоновый поток запускается при первой проверке в процессе, дописывает в
+индекс все новые вопросы и затем повторяет это раз в
+QUESTION_DEDUP_SAVE_INTERVAL секунд. Пока первое построение не закончено,
+проверка дубликатов пропускается, чтобы запрос не ждал обхода всей таблицы.
+Файл записывает один процесс - тот, что держит блокировку файла
+<индекс>.lock (команда build_question_index или первый из процессов API);
+остальные процессы только открывают заново файл, записанный им.
+"""
+
+import array
+import bisect
+import heapq
+import logging
+import mmap
+import operator
+import os
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from hashlib import blake2b
+from pathlib import Path
+from typing import Optional, Sequence
+
+from django.conf import settings
+from django.db import close_old_connections
+
+try:
+    import fcntl
+except ImportError:  # нет на Windows: каждый процесс пишет файл сам
+    fcntl = None
+
+from api.models import Question
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Сколько похожих вопросов возвращать клиенту
+MAX_DUPLICATES = 5
+# Транзакции создания вопросов фиксируются не в порядке ID: при синхронизации
+# перепроверяются вопросы, созданные за SYNC_MARGIN секунд до предыдущей
+SYNC_MARGIN = 60
+
+MAX_HASH = (1 << 32) - 1
+# Смена параметров хеширования делает старые файлы индекса непригодными
+MAGIC = b"QDEDUP02"
+HEADER = struct.Struct("<8sIIQqd")
+BAND = struct.Struct(f"<{ROWS}I")
+
+# Хеш-функции сигнатуры: 64-битный хеш триграммы XOR случайная маска.
+# Для равномерно распределенного хеша XOR с маской - случайная перестановка,
+# а операция в несколько раз дешевле умножения по модулю
+_random = random.Random(NUM_PERM)
+SEEDS = [_random.getrandbits(64) for _ in range(NUM_PERM)]
+
+NON_WORD = re.compile(r"[\W_]+")
+
+
+def shingles(text: str) -> set[str]:
+    """Символьные триграммы нормализованного текста"""
+    text = NON_WORD.sub(" ", text.lower()).strip()
+    if len(text) < 3:
+        return {text}
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def signature(text: str) -> tuple[int, ...]:
+    """MinHash-сигнатура текста из NUM_PERM 32-битных значений"""
+    hashes = [
+        int.from_bytes(blake2b(shingle.encode(), digest_size=8).digest(), "little")
+        for shingle in shingles(text)
+    ]
+    return tuple(min([value ^ seed for value in hashes]) >> 32 for seed in SEEDS)
+
+
+def band_hashes(sig: tuple[int, ...]) -> list[int]:
+    """32-битные хеши полос сигнатуры"""
+    return [
+        zlib.crc32(BAND.pack(*sig[band * ROWS : (band + 1) * ROWS]))
+        for band in range(BANDS)
+    ]
+
+
+class QuestionIndex:
+    """
+    LSH-индекс MinHash-сигнатур вопросов.
+
+    Attributes:
+        path (Path): Путь к файлу индекса
+        last_id (int): Наибольший проиндексированный ID вопроса
+        synced_at (float): Время начала последней синхронизации с базой
+        ready (bool): Индекс синхронизирован с базой хотя бы раз
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.ready = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._writer_file = None
+        self._open()
+
+    def __len__(self) -> int:
+        return self._base_count + len(self._ids)
+
+    def __contains__(self, question_id: int) -> bool:
+        ids = self._base_sorted_ids
+        i = bisect.bisect_left(ids, question_id)
+        return (i < len(ids) and ids[i] == question_id) or question_id in self._id_set
+
+    @property
+    def unsaved(self) -> int:
+        """Число вопросов, добавленных после записи файла"""
+        return len(self._ids)
+
+    def _open(self) -> None:
+        """Открывает файл индекса (если он есть) и очищает индекс в памяти"""
+        self._base_count = 0
+        self._base_ids = array.array("q")
+        self._base_sorted_ids = array.array("q")
+        self._base_sigs = array.array("I")
+        self._base_bands = [array.array("Q") for _ in range(BANDS)]
+        self.last_id = 0
+        self.synced_at = 0.0
+        self._file_id = None
+
+        if self.path.exists() and self.path.stat().st_size >= HEADER.size:
+            with open(self.path, "rb") as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                stat = os.fstat(file.fileno())
+            self._file_id = (stat.st_ino, stat.st_mtime_ns)
+            magic, num_perm, bands, count, last_id, synced_at = HEADER.unpack_from(
+                buffer
+            )
+            expected_size = HEADER.size + count * (16 + 4 * NUM_PERM + 8 * BANDS)
+            if (magic, num_perm, bands) != (MAGIC, NUM_PERM, BANDS) or (
+                len(buffer) != expected_size
+            ):
+                logger.warning(f"Файл индекса вопросов {self.path} не подходит")
+            else:
+                view = memoryview(buffer)
+                offset = HEADER.size
+                self._base_ids = view[offset : offset + 8 * count].cast("q")
+                offset += 8 * count
+                self._base_sorted_ids = view[offset : offset + 8 * count].cast("q")
+                offset += 8 * count
+                self._base_sigs = view[offset : offset + 4 * NUM_PERM * count].cast("I")
+                offset += 4 * NUM_PERM * count
+                self._base_bands = [
+                    view[start : start + 8 * count].cast("Q")
+                    for start in range(offset, offset + 8 * count * BANDS, 8 * count)
+                ]
+                self._base_count = count
+                self.last_id = last_id
+                self.synced_at = synced_at
+
+        self._ids = array.array("q")
+        self._id_set: set[int] = set()
+        self._sigs = array.array("I")
+        self._bands: list[dict[int, list[int]]] = [{} for _ in range(BANDS)]
+
+    def add(self, question_id: int, text: str) -> None:
+        """Добавляет вопрос в индекс, если его там еще нет"""
+        sig = signature(text)
+        hashes = band_hashes(sig)
+        with self._lock:
+            if question_id not in self:
+                self._append(question_id, sig, hashes)
+
+    def _append(
+        self, question_id: int, sig: Sequence[int], hashes: Sequence[int]
+    ) -> None:
+        row = len(self)
+        self._ids.append(question_id)
+        self._id_set.add(question_id)
+        self._sigs.extend(sig)
+        for band, value in enumerate(hashes):
+            self._bands[band].setdefault(value, []).append(row)
+        self.last_id = max(self.last_id, question_id)
+
+    def _reopen(self) -> None:
+        """
+        Открывает файл заново, сохраняя вопросы из памяти, которых в нем нет.
+
+        Вызывается под self._lock.
+        """
+        pending = [
+            (self._ids[i], self._sigs[i * NUM_PERM : (i + 1) * NUM_PERM])
+            for i in range(len(self._ids))
+        ]
+        last_id, synced_at = self.last_id, self.synced_at
+        self._open()
+        for question_id, sig in pending:
+            if question_id not in self:
+                self._append(question_id, sig, band_hashes(tuple(sig)))
+        self.last_id = max(self.last_id, last_id)
+        self.synced_at = max(self.synced_at, synced_at)
+
+    def sync(self, batch_size: int = 1000) -> int:
+        """
+        Добавляет вопросы из базы, которых еще нет в индексе, возвращает их число.
+
+        Кроме вопросов с ID больше last_id перепроверяются вопросы, созданные
+        за SYNC_MARGIN секунд до начала предыдущей синхронизации: вопрос с
+        меньшим ID мог зафиксироваться позже уже проиндексированного.
+        """
+        started = time.time()
+        since = datetime.fromtimestamp(
+            max(0.0, self.synced_at - SYNC_MARGIN), tz=dt_timezone.utc
+        )
+        recent = Question.objects.filter(
+            created_at__gte=since, id__lte=self.last_id
+        ).values_list("id", flat=True)
+        missing = [question_id for question_id in recent if question_id not in self]
+        added = 0
+        for start in range(0, len(missing), batch_size):
+            batch = Question.objects.filter(
+                id__in=missing[start : start + batch_size]
+            ).values_list("id", "text")
+            for question_id, text in batch:
+                self.add(question_id, text)
+                added += 1
+
+        while True:
+            batch = list(
+                Question.objects.filter(id__gt=self.last_id)
+                .order_by("id")
+                .values_list("id", "text")[:batch_size]
+            )
+            for question_id, text in batch:
+                self.add(question_id, text)
+            added += len(batch)
+            if len(batch) < batch_size:
+                break
+
+        self.synced_at = started
+        self.ready = True
+        return added
+
+    def query(self, text: str, threshold: float) -> list[tuple[int, float]]:
+        """
+        Вопросы со сходством с text не меньше threshold.
+
+        Returns:
+            Список (ID вопроса, оценка сходства) по убыванию сходства
+        """
+        sig = signature(text)
+        hashes = band_hashes(sig)
+        matches = []
+        with self._lock:
+            rows = set()
+            for band, value in enumerate(hashes):
+                keys = self._base_bands[band]
+                i = bisect.bisect_left(keys, value << 32)
+                while i < len(keys) and keys[i] >> 32 == value:
+                    rows.add(keys[i] & MAX_HASH)
+                    i += 1
+                rows.update(self._bands[band].get(value, ()))
+
+            for row in rows:
+                question_id, stored = self._row(row)
+                similarity = sum(map(operator.eq, sig, stored)) / NUM_PERM
+                if similarity >= threshold:
+                    matches.append((question_id, similarity))
+        return sorted(matches, key=lambda match: (-match[1], match[0]))
+
+    def _row(self, row: int) -> tuple[int, Sequence[int]]:
+        if row < self._base_count:
+            start = row * NUM_PERM
+            return self._base_ids[row], self._base_sigs[start : start + NUM_PERM]
+        row -= self._base_count
+        start = row * NUM_PERM
+        return self._ids[row], self._sigs[start : start + NUM_PERM]
+
+    def save(self) -> None:
+        """
+        Записывает индекс в файл целиком и открывает его заново.
+
+        Под блокировкой индекса только копируются вопросы из памяти и
+        подменяются массивы после записи: сортировка, запись и fsync идут
+        без нее, и проверки дубликатов в это время не ждут. Файл пишется во
+        временный и атомарно заменяет старый, поэтому процессы, открывшие
+        старый файл, продолжают работать с ним.
+        """
+        with self._save_lock:
+            with self._lock:
+                count = len(self)
+                saved = len(self._ids)
+                base_ids, base_sorted_ids = self._base_ids, self._base_sorted_ids
+                base_sigs, base_bands = self._base_sigs, self._base_bands
+                ids = self._ids[:saved]
+                sigs = self._sigs[: saved * NUM_PERM]
+                bands = [
+                    [value << 32 | row for value, rows in band.items() for row in rows]
+                    for band in self._bands
+                ]
+                last_id, synced_at = self.last_id, self.synced_at
+
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as file:
+                file.write(
+                    HEADER.pack(MAGIC, NUM_PERM, BANDS, count, last_id, synced_at)
+                )
+                file.write(base_ids)
+                file.write(ids)
+                file.write(array.array("q", heapq.merge(base_sorted_ids, sorted(ids))))
+                file.write(base_sigs)
+                file.write(sigs)
+                for band in range(BANDS):
+                    file.write(
+                        array.array(
+                            "Q", heapq.merge(base_bands[band], sorted(bands[band]))
+                        )
+                    )
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp, self.path)
+
+            with self._lock:
+                self._reopen()
+        logger.info(f"Индекс вопросов записан: {count} вопросов, {self.path}")
+
+    def reload(self) -> bool:
+        """Открывает файл заново, если его переписал другой процесс"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        if (stat.st_ino, stat.st_mtime_ns) == self._file_id:
+            return False
+        with self._lock:
+            self._reopen()
+        return True
+
+    def acquire_writer(self) -> bool:
+        """
+        Захватывает право записи файла (блокировка <индекс>.lock).
+
+        Блокировка держится до release_writer() или завершения процесса,
+        поэтому файл пишет один процесс. Возвращает False, если право
+        записи у другого процесса.
+        """
+        if fcntl is None or self._writer_file is not None:
+            return True
+        file = open(self.path.with_name(f"{self.path.name}.lock"), "a")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            return False
+        self._writer_file = file
+        return True
+
+    def release_writer(self) -> None:
+        if self._writer_file is not None:
+            self._writer_file.close()
+            self._writer_file = None
+
+
+class IndexBuilder(threading.Thread):
+    """
+    Фоновый поток, который строит индекс при запуске процесса, а затем
+    раз в QUESTION_DEDUP_SAVE_INTERVAL секунд дописывает новые вопросы.
+    Файл сохраняет, только если процесс получил право записи, иначе
+    открывает заново файл, записанный другим процессом.
+    """
+
+    def __init__(self, index: QuestionIndex) -> None:
+        super().__init__(name="question-index", daemon=True)
+        self.index = index
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            try:
+                close_old_connections()
+                writer = self.index.acquire_writer()
+                if not writer:
+                    self.index.reload()
+                added = self.index.sync()
+                if writer and self.index.unsaved:
+                    self.index.save()
+                logger.debug(f"Индекс вопросов обновлен: добавлено {added}")
+            except Exception:
+                logger.exception("Ошибка при обновлении индекса вопросов")
+            finally:
+                close_old_connections()
+            if self.stopped.wait(settings.QUESTION_DEDUP_SAVE_INTERVAL):
+                self.index.release_writer()
+                return
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+_index: Optional[QuestionIndex] = None
+_builder: Optional[IndexBuilder] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> QuestionIndex:
+    """
+    Индекс вопросов текущего процесса.
+
+    При первом обращении открывает файл индекса и запускает фоновое
+    построение, если QUESTION_DEDUP_SAVE_INTERVAL больше нуля. Не
+    вызывается при импорте WSGI/ASGI-приложения: с gunicorn --preload
+    поток, запущенный до fork, не перешел бы в рабочие процессы.
+    """
+    global _index, _builder
+    path = Path(settings.QUESTION_DEDUP_INDEX_PATH)
+    with _index_lock:
+        if _index is None or _index.path != path:
+            if _builder is not None:
+                _builder.stop()
+                _builder = None
+            _index = QuestionIndex(path)
+        if _builder is None and settings.QUESTION_DEDUP_SAVE_INTERVAL > 0:
+            _builder = IndexBuilder(_index)
+            _builder.start()
+        return _index
+
+
+def find_duplicates(text: str) -> list[dict]:
+    """
+    Не удаленные вопросы, похожие на text не меньше чем на
+    QUESTION_DEDUP_THRESHOLD, по убыванию сходства (не больше MAX_DUPLICATES).
+
+    Пока фоновый поток не построил индекс, возвращает пустой список. Без
+    фонового потока (QUESTION_DEDUP_SAVE_INTERVAL = 0) индекс строится
+    при первой проверке.
+    """
+    index = get_index()
+    if not index.ready and settings.QUESTION_DEDUP_SAVE_INTERVAL > 0:
+        logger.info("Индекс вопросов еще строится, проверка дубликатов пропущена")
+        return []
+    index.sync()
+    matches = index.query(text, settings.QUESTION_DEDUP_THRESHOLD)[:MAX_DUPLICATES]
+    if not matches:
+        return []
+    texts = dict(
+        Question.objects.filter(
+            id__in=[question_id for question_id, _ in matches]
+        ).values_list("id", "text")
+    )
+    return [
+        {
+            "id": question_id,
+            "text": texts[question_id],
+            "similarity": round(similarity, 2),
+        }
+        for question_id, similarity in matches
+        if question_id in texts
+    ]
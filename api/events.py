@@ -0,0 +1,145 @@
+"""
+Публикация событий о новых ответах (pub/sub).
+
+Ответы публикуются после фиксации транзакции, в которой они созданы.
+Подписчики - SSE-потоки AnswerStreamView, по одной подписке на соединение.
+Брокер выбирается настройкой ANSWER_EVENTS_BACKEND: по умолчанию события
+раздаются внутри процесса, для нескольких воркеров нужен брокер с общим
+транспортом, реализующий тот же интерфейс, что и BaseBroker.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Маркер переполнения очереди подписчика: поток должен догнать события из базы
+LAGGED = object()
+
+
+class Subscription:
+    """
+    Подписка на ответы одного вопроса.
+
+    События доставляются в asyncio-очередь цикла событий подписчика,
+    публиковать можно из любого потока.
+    """
+
+    def __init__(
+        self, question_id: int, loop: asyncio.AbstractEventLoop, maxsize: int
+    ) -> None:
+        self.question_id = question_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def push(self, event: dict[str, Any]) -> None:
+        """Передает событие подписчику (потокобезопасно)"""
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict[str, Any]) -> None:
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # накопленные события не нужны: подписчик догрузит их из базы
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(LAGGED)
+
+    async def get(self) -> Any:
+        """Следующее событие или LAGGED, если подписчик отстал"""
+        event = await self.queue.get()
+        if event is LAGGED:
+            self.lagged = False
+        return event
+
+
+class BaseBroker:
+    """Интерфейс брокера событий"""
+
+    def publish(self, question_id: int, event: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, question_id: int) -> Subscription:
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """Брокер внутри процесса: события видят только подписчики этого воркера"""
+
+    def __init__(self) -> None:
+        self._subscriptions: dict[int, set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, question_id: int, event: dict[str, Any]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(question_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.push(event)
+            except RuntimeError:
+                # цикл событий подписчика уже закрыт
+                self.unsubscribe(subscription)
+
+    def subscribe(self, question_id: int) -> Subscription:
+        subscription = Subscription(
+            question_id,
+            asyncio.get_running_loop(),
+            settings.ANSWER_STREAM_QUEUE_SIZE,
+        )
+        with self._lock:
+            self._subscriptions[question_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.question_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.question_id]
+
+
+_broker: Optional[BaseBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> BaseBroker:
+    """Брокер событий, заданный настройкой ANSWER_EVENTS_BACKEND"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.ANSWER_EVENTS_BACKEND)()
+    return _broker
+
+
+def answer_event(answer: Any) -> dict[str, Any]:
+    """Данные события о новом ответе (поля совпадают с AnswerSerializer)"""
+    return {
+        "id": answer.id,
+        "question_id": answer.question_id,
+        "user_id": str(answer.user_id),
+        "text": answer.text,
+        "created_at": answer.created_at.isoformat().replace("+00:00", "Z"),
+    }
+
+
+def publish_answer(answer: Any) -> None:
+    """Публикует событие о новом ответе подписчикам его вопроса"""
+    try:
+        get_broker().publish(answer.question_id, answer_event(answer))
+    except Exception:
+        logger.exception(f"Не удалось опубликовать ответ ID {answer.id}")
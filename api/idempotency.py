@@ -0,0 +1,124 @@
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils import timezone
+
+from api.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+IN_PROGRESS = 0
+
+
+class IdempotentPostMixin:
+    """
+    Поддержка заголовка Idempotency-Key для POST запросов.
+
+    Перед обработкой запроса ключ резервируется отдельной транзакцией
+    (строка с кодом IN_PROGRESS), поэтому побочные эффекты вне базы, например
+    постановка ответа в буфер, выполняются только после фиксации ключа.
+    Параллельный запрос с тем же ключом получает 409. Успешный ответ
+    сохраняется в той же транзакции, что и сама запись; при ошибке резерв
+    снимается. Повтор запроса с тем же ключом возвращает сохраненный ответ,
+    не выполняя запись повторно; повтор с тем же ключом, но другим телом,
+    отклоняется с кодом 422. Ключи хранятся IDEMPOTENCY_KEY_TTL секунд,
+    брошенные резервы - IDEMPOTENCY_RESERVATION_TIMEOUT секунд. Запросы без
+    заголовка обрабатываются как обычно, без дополнительных обращений к базе.
+    """
+
+    def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if request.method != "POST" or key is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return JsonResponse(
+                {"error": f"Некорректный заголовок {IDEMPOTENCY_HEADER}"}, status=400
+            )
+
+        key_hash = hashlib.sha256(f"{request.path}\n{key}".encode()).hexdigest()
+        request_hash = hashlib.sha256(request.body).hexdigest()
+
+        # ключи читаются из основной базы: реплика может не знать о резерве
+        keys = IdempotencyKey.objects.using(router.db_for_write(IdempotencyKey))
+        stored = keys.filter(pk=key_hash).first()
+        if stored is not None:
+            if not self._is_expired(stored):
+                return self._replay(stored, request_hash)
+            stored.delete()
+
+        try:
+            with transaction.atomic(using=keys.db):
+                keys.create(
+                    key_hash=key_hash,
+                    request_hash=request_hash,
+                    status_code=IN_PROGRESS,
+                    content_type="",
+                    body=b"",
+                )
+        except IntegrityError:
+            # ключ зарезервирован параллельным запросом
+            stored = keys.filter(pk=key_hash).first()
+            if stored is None:
+                raise
+            logger.info(f"Параллельный повтор запроса с ключом идемпотентности {key}")
+            return self._replay(stored, request_hash)
+
+        completed = False
+        try:
+            with transaction.atomic():
+                response = super().dispatch(request, *args, **kwargs)
+                if 200 <= response.status_code < 300:
+                    if hasattr(response, "render"):
+                        response.render()
+                    keys.filter(pk=key_hash).update(
+                        status_code=response.status_code,
+                        content_type=response.get("Content-Type", ""),
+                        body=response.content,
+                        created_at=timezone.now(),
+                    )
+                    completed = True
+        finally:
+            if not completed:
+                keys.filter(pk=key_hash).delete()
+        return response
+
+    @staticmethod
+    def _is_expired(stored: IdempotencyKey) -> bool:
+        if stored.status_code == IN_PROGRESS:
+            ttl = settings.IDEMPOTENCY_RESERVATION_TIMEOUT
+        else:
+            ttl = settings.IDEMPOTENCY_KEY_TTL
+        return stored.created_at < timezone.now() - timedelta(seconds=ttl)
+
+    @staticmethod
+    def _replay(stored: IdempotencyKey, request_hash: str) -> HttpResponse:
+        if stored.status_code == IN_PROGRESS:
+            return JsonResponse(
+                {"error": f"Запрос с этим {IDEMPOTENCY_HEADER} еще выполняется"},
+                status=409,
+                headers={"Retry-After": "1"},
+            )
+        if stored.request_hash != request_hash:
+            return JsonResponse(
+                {
+                    "error": f"{IDEMPOTENCY_HEADER} уже использован "
+                    "для запроса с другим телом"
+                },
+                status=422,
+            )
+        logger.info(f"Повтор запроса, возвращен сохраненный ответ {stored}")
+        response = HttpResponse(
+            bytes(stored.body),
+            status=stored.status_code,
+            content_type=stored.content_type,
+        )
+        response["Idempotent-Replayed"] = "true"
+        return response
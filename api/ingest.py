@@ -0,0 +1,332 @@
+"""
+Отложенная запись ответов (write-behind).
+
+В этом режиме AnswerCreateView не вставляет ответ в основную базу, а
+сохраняет его в надежный локальный буфер (SQLite в режиме WAL) и сразу
+возвращает 202 со ссылкой на статус. Фоновый поток забирает накопленные
+ответы пачками и записывает их в основную базу одним bulk_create на пачку.
+
+Строки буфера забираются в работу с арендой (lease): если процесс упал
+между захватом пачки и отметкой о записи, по истечении аренды пачку
+заберет другой поток или процесс. Гарантия доставки - at-least-once.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+
+from api.events import publish_answer
+from api.models import Answer, Question
+from api.trending import record_answer
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_FLUSHING = "flushing"
+STATUS_CREATED = "created"
+STATUS_REJECTED = "rejected"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_answers (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket TEXT NOT NULL UNIQUE,
+    question_id INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL,
+    claimed_at REAL,
+    answer_id INTEGER,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pending_answers_queue
+    ON pending_answers (status, seq) WHERE status IN ('pending', 'flushing');
+CREATE INDEX IF NOT EXISTS pending_answers_done
+    ON pending_answers (updated_at) WHERE status IN ('created', 'rejected');
+"""
+
+
+class BufferFull(Exception):
+    """Буфер заполнен, клиенту следует повторить запрос позже"""
+
+
+@dataclass
+class BufferedAnswer:
+    """Ответ, ожидающий записи в основную базу"""
+
+    seq: int
+    ticket: str
+    question_id: int
+    user_id: str
+    text: str
+
+
+class AnswerBuffer:
+    """
+    Надежная очередь ответов в локальном файле SQLite.
+
+    Attributes:
+        path (Path): Путь к файлу буфера
+        max_pending (int): Максимум незаписанных ответов (для backpressure)
+    """
+
+    def __init__(self, path: Path, max_pending: int) -> None:
+        self.path = Path(path)
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+
+    def enqueue(self, question_id: int, user_id: uuid.UUID, text: str) -> str:
+        """
+        Добавляет ответ в буфер и возвращает его ticket.
+
+        Raises:
+            BufferFull: если незаписанных ответов уже max_pending
+        """
+        ticket = str(uuid.uuid4())
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                (pending,) = self._conn.execute(
+                    "SELECT count(*) FROM pending_answers "
+                    "WHERE status IN ('pending', 'flushing')"
+                ).fetchone()
+                if pending >= self.max_pending:
+                    raise BufferFull(f"В буфере {pending} незаписанных ответов")
+                self._conn.execute(
+                    "INSERT INTO pending_answers "
+                    "(ticket, question_id, user_id, text, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        ticket,
+                        question_id,
+                        str(user_id),
+                        text,
+                        STATUS_PENDING,
+                        time.time(),
+                    ),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return ticket
+
+    def claim(self, limit: int, lease: float) -> list[BufferedAnswer]:
+        """Забирает в работу до limit ответов, включая пачки с истекшей арендой"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT seq, ticket, question_id, user_id, text FROM pending_answers "
+                    "WHERE status = 'pending' "
+                    "OR (status = 'flushing' AND claimed_at < ?) "
+                    "ORDER BY seq LIMIT ?",
+                    (now - lease, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE pending_answers SET status = ?, claimed_at = ? WHERE seq = ?",
+                    [(STATUS_FLUSHING, now, row[0]) for row in rows],
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return [BufferedAnswer(*row) for row in rows]
+
+    def complete(self, results: list[tuple[int, str, Optional[int]]]) -> None:
+        """Отмечает ответы записанными: список (seq, статус, id ответа)"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE pending_answers SET status = ?, answer_id = ?, updated_at = ? "
+                "WHERE seq = ?",
+                [(status, answer_id, now, seq) for seq, status, answer_id in results],
+            )
+
+    def status(self, ticket: str) -> Optional[dict]:
+        """Статус ответа по ticket или None, если ticket неизвестен"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, answer_id FROM pending_answers WHERE ticket = ?",
+                (ticket,),
+            ).fetchone()
+        if row is None:
+            return None
+        status = STATUS_PENDING if row[0] == STATUS_FLUSHING else row[0]
+        return {"ticket": ticket, "status": status, "answer_id": row[1]}
+
+    def evict(self, retention: float) -> int:
+        """Удаляет записанные ответы старше retention секунд"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM pending_answers "
+                "WHERE status IN ('created', 'rejected') AND updated_at < ?",
+                (time.time() - retention,),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def flush_pending(buffer: AnswerBuffer, batch_size: int, lease: float) -> int:
+    """
+    Записывает одну пачку ответов из буфера в основную базу.
+
+    Ответы на вопросы, удаленные после приема ответа, отклоняются.
+    Возвращает число обработанных ответов.
+    """
+    batch = buffer.claim(batch_size, lease)
+    if not batch:
+        return 0
+
+    # Вопросы проверяются в основной базе, куда пишутся ответы: поток записи
+    # работает вне запроса, и маршрутизатор направил бы чтение в реплику,
+    # которая может еще не получить только что созданный вопрос
+    question_ids = {item.question_id for item in batch}
+    existing = set(
+        Question.objects.using(router.db_for_write(Question))
+        .filter(id__in=question_ids)
+        .values_list("id", flat=True)
+    )
+    accepted = [item for item in batch if item.question_id in existing]
+    with transaction.atomic():
+        answers = Answer.objects.bulk_create(
+            [
+                Answer(
+                    question_id=item.question_id,
+                    user_id=uuid.UUID(item.user_id),
+                    text=item.text,
+                )
+                for item in accepted
+            ]
+        )
+
+    results = [
+        (item.seq, STATUS_CREATED, answer.id) for item, answer in zip(accepted, answers)
+    ]
+    results += [
+        (item.seq, STATUS_REJECTED, None)
+        for item in batch
+        if item.question_id not in existing
+    ]
+    buffer.complete(results)
+    for answer in answers:
+        publish_answer(answer)
+        record_answer(answer)
+    logger.info(
+        f"Записана пачка ответов: создано {len(accepted)}, "
+        f"отклонено {len(batch) - len(accepted)}"
+    )
+    return len(batch)
+
+
+class AnswerFlusher(threading.Thread):
+    """Фоновый поток, периодически сбрасывающий буфер в основную базу"""
+
+    def __init__(self, buffer: AnswerBuffer) -> None:
+        super().__init__(name="answer-flusher", daemon=True)
+        self.buffer = buffer
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            self.wakeup.wait(settings.ANSWER_FLUSH_INTERVAL)
+            self.wakeup.clear()
+            try:
+                close_old_connections()
+                while flush_pending(
+                    self.buffer,
+                    settings.ANSWER_FLUSH_BATCH_SIZE,
+                    settings.ANSWER_FLUSH_LEASE,
+                ):
+                    pass
+                self.buffer.evict(settings.ANSWER_BUFFER_RETENTION)
+            except Exception:
+                logger.exception("Ошибка при записи буфера ответов")
+            finally:
+                close_old_connections()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.wakeup.set()
+
+
+_buffer: Optional[AnswerBuffer] = None
+_flusher: Optional[AnswerFlusher] = None
+_state_lock = threading.Lock()
+
+
+def get_buffer() -> AnswerBuffer:
+    """
+    Буфер ответов текущего процесса.
+
+    При первом обращении открывает файл буфера (незаписанные ответы,
+    оставшиеся после падения, будут записаны) и запускает фоновый поток,
+    если ANSWER_FLUSH_INTERVAL больше нуля.
+    """
+    global _buffer, _flusher
+    path = Path(settings.ANSWER_BUFFER_PATH)
+    with _state_lock:
+        if _buffer is None or _buffer.path != path:
+            if _flusher is not None:
+                _flusher.stop()
+                _flusher = None
+            _buffer = AnswerBuffer(path, settings.ANSWER_BUFFER_MAX_PENDING)
+        if _flusher is None and settings.ANSWER_FLUSH_INTERVAL > 0:
+            _flusher = AnswerFlusher(_buffer)
+            _flusher.start()
+        _buffer.max_pending = settings.ANSWER_BUFFER_MAX_PENDING
+        return _buffer
+
+
+def start_flusher() -> None:
+    """
+    Запускает запись буфера при старте процесса, не дожидаясь запросов.
+
+    Нужна для ответов, оставшихся в буфере после падения или перезапуска:
+    без нее они ждали бы первого запроса, открывающего буфер. Если файла
+    буфера нет, восстанавливать нечего - он откроется при первом ответе.
+    """
+    if (
+        settings.ANSWER_WRITE_BEHIND
+        and settings.ANSWER_FLUSH_INTERVAL > 0
+        and Path(settings.ANSWER_BUFFER_PATH).exists()
+    ):
+        get_buffer()
+
+
+def _restart_after_fork() -> None:
+    """
+    Сбрасывает буфер в дочернем процессе (gunicorn --preload).
+
+    Поток записи родителя в дочерний процесс не переходит, а соединение
+    SQLite нельзя использовать после fork, поэтому процесс открывает буфер
+    заново.
+    """
+    global _buffer, _flusher, _state_lock
+    _buffer = None
+    _flusher = None
+    _state_lock = threading.Lock()
+    start_flusher()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
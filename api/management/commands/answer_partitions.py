@@ -0,0 +1,90 @@
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from api import partitioning
+
+
+class Command(BaseCommand):
+    """
+    Обслуживание секций таблицы ответов.
+
+    С --convert однократно переводит таблицу на секционирование. Создает
+    секции на будущие месяцы и архивирует старые: секция отсоединяется,
+    выгружается в сжатый CSV на локальный диск и удаляется. Рассчитана на
+    ежедневный запуск по расписанию.
+    """
+
+    help = "Создает будущие секции api_answer и архивирует старые"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.ANSWER_PARTITIONS_AHEAD,
+            help="На сколько месяцев вперед создавать секции",
+        )
+        parser.add_argument(
+            "--archive-older-than",
+            type=int,
+            help="Архивировать секции старше указанного числа месяцев",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            type=Path,
+            default=settings.ANSWER_ARCHIVE_DIR,
+            help="Каталог для архивов секций",
+        )
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Перевести таблицу api_answer на секционирование (однократно)",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        connection = connections[options["database"]]
+        if not partitioning.is_enabled(connection):
+            self.stdout.write(
+                self.style.WARNING(
+                    "Секционирование выключено (нужны PostgreSQL и ANSWER_PARTITIONING=True)"
+                )
+            )
+            return
+
+        if options["convert"] and not partitioning.is_partitioned(connection):
+            with transaction.atomic(using=connection.alias):
+                partitioning.convert_to_partitioned(connection, options["ahead"])
+            self.stdout.write(self.style.SUCCESS("Таблица api_answer секционирована"))
+        if not partitioning.is_partitioned(connection):
+            self.stderr.write(
+                self.style.ERROR(
+                    "Таблица api_answer не секционирована, запустите с --convert"
+                )
+            )
+            return
+
+        lapsed = partitioning.default_partition_rows(connection)
+        if lapsed:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"В секции по умолчанию {lapsed} ответов: задание не "
+                    "запускалось вовремя, ответы будут перенесены в секции месяцев"
+                )
+            )
+
+        for name in partitioning.create_future_partitions(connection, options["ahead"]):
+            self.stdout.write(f"Секция {name} готова")
+
+        if options["archive_older_than"] is not None:
+            archived = partitioning.archive_old_partitions(
+                connection, options["archive_older_than"], options["archive_dir"]
+            )
+            for path in archived:
+                self.stdout.write(f"Секция сохранена в {path}")
+            self.stdout.write(
+                self.style.SUCCESS(f"Архивировано секций: {len(archived)}")
+            )
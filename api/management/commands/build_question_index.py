@@ -0,0 +1,50 @@
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from api.dedup import QuestionIndex
+
+
+class Command(BaseCommand):
+    """
+    Построение индекса почти одинаковых вопросов.
+
+    Дописывает в файл индекса вопросы, добавленные после его записи, чтобы
+    процессы API при запуске открывали готовый индекс, а не считали
+    сигнатуры всех вопросов. Рассчитана на запуск при деплое и по
+    расписанию. Если файл ведет работающий процесс API (держит блокировку
+    записи), команда ничего не делает.
+    """
+
+    help = "Дописывает новые вопросы в индекс поиска дубликатов"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Вопросов за один запрос"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started = time.perf_counter()
+        index = QuestionIndex(settings.QUESTION_DEDUP_INDEX_PATH)
+        if not index.acquire_writer():
+            self.stderr.write(
+                self.style.WARNING(
+                    "Индекс записывает работающий процесс API, команда пропущена"
+                )
+            )
+            return
+        try:
+            added = index.sync(batch_size=options["batch_size"])
+            if added:
+                index.save()
+        finally:
+            index.release_writer()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Добавлено вопросов: {added}, всего в индексе: {len(index)}, "
+                f"{settings.QUESTION_DEDUP_INDEX_PATH} "
+                f"({time.perf_counter() - started:.1f} с)"
+            )
+        )
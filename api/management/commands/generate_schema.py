@@ -0,0 +1,49 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import (BaseCommand, CommandError,
+                                         CommandParser)
+
+from config.openapi import SCHEMA_FORMATS, generate_schema, schema_path
+
+
+class Command(BaseCommand):
+    """
+    Генерация схемы API в файлы openapi.json и openapi.yaml.
+
+    Файлы хранятся в репозитории и отдаются по /swagger.json/ и
+    /swagger.yaml/ без обхода представлений на каждый запрос. Команду
+    нужно запускать после изменения представлений или сериализаторов.
+    """
+
+    help = "Генерирует файлы схемы API"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Не записывать файлы, а завершиться с ошибкой, если они устарели",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        settings.OPENAPI_SCHEMA_DIR.mkdir(parents=True, exist_ok=True)
+        stale = []
+        for fmt in SCHEMA_FORMATS:
+            path = schema_path(fmt)
+            content = generate_schema(fmt)
+            if path.exists() and path.read_bytes() == content:
+                continue
+            stale.append(path.name)
+            if not options["check"]:
+                path.write_bytes(content)
+
+        if options["check"] and stale:
+            raise CommandError(
+                f"Схема API устарела: {', '.join(stale)}. "
+                "Запустите python manage.py generate_schema"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлено файлов схемы: {len(stale)}")
+            if not options["check"]
+            else self.style.SUCCESS("Схема API актуальна")
+        )
@@ -0,0 +1,119 @@
+import logging
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import router, transaction
+from django.utils import timezone
+
+from api.models import Answer, IdempotencyKey, Question, delete_in_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Физическое удаление мягко удаленных вопросов и ответов, а также ключей
+    идемпотентности с истекшим сроком хранения.
+
+    Строки удаляются пачками, каждая пачка - отдельная короткая транзакция,
+    между пачками делается пауза, чтобы не нагружать базу и не держать
+    блокировки. Рассчитана на периодический запуск по расписанию.
+    """
+
+    help = "Удаляет помеченные удаленными вопросы и ответы пачками"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Размер пачки удаления"
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Пауза между пачками, с",
+        )
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=0,
+            help="Удалять записи, помеченные удаленными больше N секунд назад",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        started = time.perf_counter()
+        cutoff = timezone.now() - timedelta(seconds=options["older_than"])
+        batch_size = options["batch_size"]
+        pause = options["pause"]
+        # Строки выбираются и удаляются в основной базе: вне запроса
+        # маршрутизатор направил бы чтение в реплику
+        using = router.db_for_write(Question)
+
+        answers_deleted = delete_in_chunks(
+            Answer.all_objects.filter(deleted_at__lte=cutoff), batch_size, using, pause
+        )
+
+        questions_deleted = 0
+        deleted_questions = Question.all_objects.using(using).filter(
+            deleted_at__lte=cutoff
+        )
+        while True:
+            ids = list(deleted_questions.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            for question_id in ids:
+                answers, questions = self.purge_question(
+                    question_id, cutoff, batch_size, using, pause
+                )
+                answers_deleted += answers
+                questions_deleted += questions
+            time.sleep(pause)
+
+        keys_expired = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        keys_deleted = delete_in_chunks(
+            IdempotencyKey.objects.filter(created_at__lt=keys_expired),
+            batch_size,
+            router.db_for_write(IdempotencyKey),
+            pause,
+        )
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Очистка удаленных записей: вопросов {questions_deleted}, "
+            f"ответов {answers_deleted}, ключей идемпотентности {keys_deleted} "
+            f"за {elapsed:.1f} с"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Удалено вопросов: {questions_deleted}, ответов: {answers_deleted}, "
+                f"ключей идемпотентности: {keys_deleted}"
+            )
+        )
+
+    @staticmethod
+    def purge_question(
+        question_id: int, cutoff: Any, batch_size: int, using: str, pause: float
+    ) -> tuple[int, int]:
+        """
+        Удаляет вопрос вместе с ответами, возвращает (ответов, вопросов).
+
+        Основная часть ответов удаляется пачками без блокировок. Остаток и
+        сам вопрос удаляются в одной транзакции под блокировкой строки
+        вопроса (SELECT ... FOR UPDATE): вставка ответа, начатая раньше
+        (например, записью буфера), будет удалена вместе с остатком, а
+        начатая позже дождется транзакции и получит ошибку внешнего ключа.
+        """
+        answers = Answer.all_objects.filter(question_id=question_id)
+        deleted = delete_in_chunks(answers, batch_size, using, pause)
+        with transaction.atomic(using=using):
+            locked = (
+                Question.all_objects.using(using)
+                .select_for_update()
+                .filter(pk=question_id, deleted_at__lte=cutoff)
+            )
+            if not locked.exists():
+                return deleted, 0
+            deleted += delete_in_chunks(answers, batch_size, using)
+            return deleted, locked._raw_delete(using)
@@ -0,0 +1,133 @@
+import logging
+import math
+import random
+import time
+import uuid
+from typing import Any, Iterator
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from api.models import Answer, Question
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT_LENGTH = 1000
+CORPUS_WORDS = 20_000
+
+WORDS = (
+    "как почему где когда можно нужно ли что это такое работает сделать настроить "
+    "django python postgres запрос ответ вопрос сервер база данных индекс кэш "
+    "ошибка тест миграция модель поле список страница пользователь время дата "
+    "файл код функция класс метод значение строка число память процесс поток "
+    "очередь сеть клиент api json схема версия обновление удаление создание"
+).split()
+
+
+class Command(BaseCommand):
+    """
+    Генерация синтетических вопросов и ответов для нагрузочного тестирования.
+
+    Число ответов на вопрос распределено по степенному закону (закон Парето),
+    длина текстов - логнормально с ограничением в 1000 символов. При одинаковом
+    --seed команда генерирует одинаковые данные.
+    """
+
+    help = "Заполняет базу синтетическими вопросами и ответами"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--questions", type=int, default=10_000, help="Количество вопросов"
+        )
+        parser.add_argument(
+            "--alpha",
+            type=float,
+            default=1.5,
+            help="Показатель степенного закона для числа ответов на вопрос",
+        )
+        parser.add_argument(
+            "--max-answers",
+            type=int,
+            default=10_000,
+            help="Максимальное число ответов на один вопрос",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5_000, help="Размер пачки bulk_create"
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Зерно генератора случайных чисел"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rng = random.Random(options["seed"])
+        corpus = self._corpus(rng)
+        batch_size = options["batch_size"]
+        started = time.perf_counter()
+        total_questions = 0
+        total_answers = 0
+
+        for chunk in self._chunks(options["questions"], batch_size):
+            with transaction.atomic():
+                questions = Question.objects.bulk_create(
+                    [Question(text=self._text(rng, corpus)) for _ in range(chunk)]
+                )
+                answers = []
+                for question in questions:
+                    count = self._answers_count(
+                        rng, options["alpha"], options["max_answers"]
+                    )
+                    for _ in range(count):
+                        answers.append(
+                            Answer(
+                                question_id=question.id,
+                                user_id=uuid.UUID(int=rng.getrandbits(128), version=4),
+                                text=self._text(rng, corpus),
+                            )
+                        )
+                        if len(answers) >= batch_size:
+                            Answer.objects.bulk_create(answers)
+                            total_answers += len(answers)
+                            answers = []
+                Answer.objects.bulk_create(answers)
+                total_answers += len(answers)
+            total_questions += len(questions)
+            self.stdout.write(
+                f"Создано вопросов: {total_questions}, ответов: {total_answers}"
+            )
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Сгенерировано {total_questions} вопросов и {total_answers} ответов "
+            f"за {elapsed:.1f} с (seed {options['seed']})"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово: {total_questions} вопросов, {total_answers} ответов "
+                f"за {elapsed:.1f} с"
+            )
+        )
+
+    @staticmethod
+    def _chunks(total: int, size: int) -> Iterator[int]:
+        """Разбивает total на пачки размером не больше size"""
+        for start in range(0, total, size):
+            yield min(size, total - start)
+
+    @staticmethod
+    def _answers_count(rng: random.Random, alpha: float, limit: int) -> int:
+        """Число ответов на вопрос по закону Парето (большинство вопросов - без ответов)"""
+        return min(int(rng.paretovariate(alpha)) - 1, limit)
+
+    @staticmethod
+    def _corpus(rng: random.Random) -> str:
+        """Строка из случайных слов, из которой нарезаются тексты"""
+        return " ".join(rng.choice(WORDS) for _ in range(CORPUS_WORDS))
+
+    @staticmethod
+    def _text(rng: random.Random, corpus: str) -> str:
+        """Фрагмент корпуса логнормальной длины от 1 до 1000 символов"""
+        length = min(
+            max(int(rng.lognormvariate(math.log(120), 0.9)), 1), MAX_TEXT_LENGTH
+        )
+        start = rng.randrange(len(corpus) - length)
+        return corpus[start : start + length].strip() or WORDS[0]
@@ -0,0 +1,158 @@
+import logging
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from django.core.signals import request_finished
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from config import BOOT_STARTED
+
+logger = logging.getLogger(__name__)
+
+Metric = tuple[str, str, Optional[float]]
+
+_collectors: list[Callable[[], Iterable[Metric]]] = []
+
+_ready_at: Optional[float] = None
+_first_request_at: Optional[float] = None
+
+
+def register(collector: Callable[[], Iterable[Metric]]):
+    """
+    Регистрирует функцию, возвращающую метрики (имя, описание, значение).
+
+    Метрики со значением None не выводятся.
+    """
+    _collectors.append(collector)
+    return collector
+
+
+def mark_ready() -> None:
+    """Отмечает готовность приложений и ждет завершения первого запроса"""
+    global _ready_at
+    _ready_at = time.perf_counter()
+    request_finished.connect(_on_first_request, dispatch_uid="api.metrics")
+
+
+def _on_first_request(sender, **kwargs) -> None:
+    global _first_request_at
+    request_finished.disconnect(dispatch_uid="api.metrics")
+    _first_request_at = time.perf_counter()
+    logger.info(f"Время до первого запроса: {time_to_first_request():.3f} с")
+
+
+def _since_boot(moment: Optional[float]) -> Optional[float]:
+    return None if moment is None else moment - BOOT_STARTED
+
+
+def time_to_first_request() -> Optional[float]:
+    """Время от начала загрузки проекта до завершения первого запроса, с"""
+    return _since_boot(_first_request_at)
+
+
+@register
+def startup_metrics() -> Iterable[Metric]:
+    yield (
+        "app_boot_seconds",
+        "Время от начала загрузки проекта до готовности приложений",
+        _since_boot(_ready_at),
+    )
+    yield (
+        "app_time_to_first_request_seconds",
+        "Время от начала загрузки проекта до завершения первого запроса",
+        time_to_first_request(),
+    )
+
+
+# Метрики пула: (имя, описание, ключ psycopg_pool.get_stats(), множитель)
+POOL_METRICS = [
+    ("db_pool_min_size", "Минимальный размер пула", "pool_min", 1),
+    ("db_pool_max_size", "Максимальный размер пула", "pool_max", 1),
+    ("db_pool_size", "Открыто соединений в пуле", "pool_size", 1),
+    ("db_pool_available", "Свободных соединений в пуле", "pool_available", 1),
+    ("db_pool_requests_waiting", "Запросов ждут соединение", "requests_waiting", 1),
+    ("db_pool_requests_total", "Выдано соединений из пула", "requests_num", 1),
+    (
+        "db_pool_requests_queued_total",
+        "Запросов, ждавших свободное соединение",
+        "requests_queued",
+        1,
+    ),
+    (
+        "db_pool_wait_seconds_total",
+        "Суммарное ожидание соединения",
+        "requests_wait_ms",
+        0.001,
+    ),
+    (
+        "db_pool_timeouts_total",
+        "Запросов, не дождавшихся соединения",
+        "requests_errors",
+        1,
+    ),
+    (
+        "db_pool_connections_lost_total",
+        "Потерянных соединений пула",
+        "connections_lost",
+        1,
+    ),
+]
+
+
+def connection_pools() -> dict[str, Any]:
+    """
+    Пулы соединений процесса по алиасам баз.
+
+    Используется документированное свойство connection.pool: оно есть только
+    у PostgreSQL и равно None, если пул не настроен (OPTIONS["pool"]). Django
+    хранит пулы общими для всех потоков, поэтому метрики одинаковы из любого
+    потока. Если пул еще не открыт, свойство откроет его, как сделал бы
+    первый запрос к базе.
+    """
+    pools: dict[str, Any] = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is not None:
+            pools[alias] = pool
+    return pools
+
+
+@register
+def pool_metrics() -> Iterable[Metric]:
+    for alias, pool in connection_pools().items():
+        stats = pool.get_stats()
+        for name, description, key, scale in POOL_METRICS:
+            yield (
+                f'{name}{{alias="{alias}"}}',
+                description,
+                stats.get(key, 0) * scale,
+            )
+
+
+def render() -> str:
+    """
+    Выводит метрики в текстовом формате Prometheus.
+
+    Имя метрики может содержать метки ({alias="default"}); метрики с
+    окончанием _total выводятся как счетчики, остальные - как gauge.
+    """
+    families: dict[str, tuple[str, list[str]]] = {}
+    for collector in _collectors:
+        for name, description, value in collector():
+            if value is None:
+                continue
+            family = name.partition("{")[0]
+            families.setdefault(family, (description, []))[1].append(f"{name} {value}")
+
+    lines = []
+    for family, (description, samples) in families.items():
+        kind = "counter" if family.endswith("_total") else "gauge"
+        lines += [f"# HELP {family} {description}", f"# TYPE {family} {kind}"]
+        lines += samples
+    return "\n".join(lines) + "\n"
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Метрики процесса для Prometheus"""
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4")
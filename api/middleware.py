@@ -0,0 +1,123 @@
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from api.db_routers import (choose_replica, reset_read_database,
+                            use_read_database)
+
+try:
+    from psycopg_pool import PoolTimeout
+except ImportError:  # пул доступен только с psycopg 3
+    PoolTimeout = None
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PRIMARY_PIN_COOKIE = "pin_primary"
+
+
+class PrimaryPinningMiddleware:
+    """
+    Выбор базы для чтения на время запроса (read-your-writes).
+
+    Изменяющие запросы и запросы клиента, который недавно что-то записал,
+    читают из основной базы. Остальные запросы целиком читают из одной
+    реплики, выбранной с учетом весов. После успешной записи клиент получает
+    cookie, закрепляющий его за основной базой на READ_YOUR_WRITES_WINDOW
+    секунд, чтобы он увидел свои изменения несмотря на отставание реплик.
+
+    Поддерживает и синхронный, и асинхронный режим, чтобы не переключать
+    контекст для асинхронных представлений (SSE-поток ответов). Выбор базы
+    действует только до возврата ответа: тело StreamingHttpResponse
+    выполняется позже, поэтому потоковые представления выбирают базу сами.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        token = use_read_database(self._read_alias(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_read_database(token)
+        return self._pin_after_write(request, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        token = use_read_database(self._read_alias(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_read_database(token)
+        return self._pin_after_write(request, response)
+
+    def _read_alias(self, request: HttpRequest) -> str:
+        if request.method not in SAFE_METHODS or self._is_pinned(request):
+            return DEFAULT_DB_ALIAS
+        return choose_replica()
+
+    @staticmethod
+    def _pin_after_write(request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            window = settings.READ_YOUR_WRITES_WINDOW
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                str(time.time() + window),
+                max_age=window,
+                httponly=True,
+                samesite="Lax",
+            )
+            logger.debug(f"Клиент закреплен за основной базой на {window} с")
+        return response
+
+    @staticmethod
+    def _is_pinned(request: HttpRequest) -> bool:
+        try:
+            return float(request.COOKIES.get(PRIMARY_PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+
+class PoolTimeoutMiddleware(MiddlewareMixin):
+    """
+    Ответ 503 вместо 500, когда в пуле нет свободного соединения с базой.
+
+    Django оборачивает PoolTimeout в свой OperationalError, исходное
+    исключение остается в __cause__. Клиент получает Retry-After и может
+    повторить запрос, когда пул освободится.
+    """
+
+    def process_exception(
+        self, request: HttpRequest, exception: Exception
+    ) -> Optional[JsonResponse]:
+        if PoolTimeout is None or not isinstance(exception, OperationalError):
+            return None
+        if not isinstance(exception.__cause__, PoolTimeout):
+            return None
+
+        logger.warning(f"Нет свободного соединения в пуле: {exception}")
+        return JsonResponse(
+            {"error": "Сервис перегружен, повторите запрос позже"},
+            status=503,
+            headers={"Retry-After": str(settings.DATABASE_POOL_RETRY_AFTER)},
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_answer_partitioning"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="answer",
+            name="question",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="answers",
+                to="api.question",
+                verbose_name="Вопрос",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                fields=["question", "id"], name="answer_question_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_soft_delete"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                (
+                    "key_hash",
+                    models.CharField(
+                        max_length=64,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Хеш ключа",
+                    ),
+                ),
+                (
+                    "request_hash",
+                    models.CharField(max_length=64, verbose_name="Хеш запроса"),
+                ),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(verbose_name="Код ответа"),
+                ),
+                (
+                    "content_type",
+                    models.CharField(max_length=100, verbose_name="Тип ответа"),
+                ),
+                ("body", models.BinaryField(verbose_name="Тело ответа")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Дата сохранения"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ключ идемпотентности",
+                "verbose_name_plural": "Ключи идемпотентности",
+            },
+        ),
+    ]
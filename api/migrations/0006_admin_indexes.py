@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:19
+
+from django.db import migrations, models
+
+SEARCH_INDEXES = {
+    "Question": "question_text_search_idx",
+    "Answer": "answer_text_search_idx",
+}
+
+
+def search_index(name):
+    # импорт здесь: модули требуют драйвер PostgreSQL
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return GinIndex(SearchVector("text", config="simple"), name=name)
+
+
+def create_search_indexes(apps, schema_editor):
+    """GIN-индексы полнотекстового поиска для админки (только PostgreSQL)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name, index_name in SEARCH_INDEXES.items():
+        schema_editor.add_index(
+            apps.get_model("api", model_name), search_index(index_name)
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for model_name, index_name in SEARCH_INDEXES.items():
+        schema_editor.remove_index(
+            apps.get_model("api", model_name), search_index(index_name)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="answer",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, db_index=True, verbose_name="Дата создания ответа"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, db_index=True, verbose_name="Дата создания вопроса"
+            ),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
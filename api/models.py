@@ -1,10 +1,46 @@
 import logging
+import time
 import uuid
 
-from django.db import models
+from django.conf import settings
+from django.db import models, router, transaction
+from django.utils import timezone
+
+from api.events import publish_answer
+from api.trending import record_answer
 
 logger = logging.getLogger(__name__)
 
+LIVE = models.Q(deleted_at__isnull=True)
+DELETED = models.Q(deleted_at__isnull=False)
+
+
+class LiveManager(models.Manager):
+    """Менеджер, возвращающий только не удаленные (мягко) записи"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+def delete_in_chunks(queryset, chunk_size, using, pause=0.0):
+    """
+    Удаляет строки queryset пачками прямыми DELETE, без сборщика Django.
+
+    ID строк выбираются и удаляются в базе using: queryset.db вне запроса
+    указывал бы на реплику (см. ReplicaRouter). Между пачками делает паузу
+    pause секунд. Возвращает число удаленных строк.
+    """
+    model = queryset.model
+    queryset = queryset.using(using)
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        deleted += model._base_manager.filter(pk__in=ids)._raw_delete(using)
+        if pause:
+            time.sleep(pause)
+
 
 class Question(models.Model):
     """
@@ -13,16 +49,29 @@ class Question(models.Model):
     Attributes:
         text (TextField): Текст вопроса
         created_at (DateTimeField): Дата и время создания вопроса
+        deleted_at (DateTimeField): Дата и время мягкого удаления
     """
 
     text = models.TextField(verbose_name="Текст вопроса")
     created_at = models.DateTimeField(
-        auto_now_add=True, verbose_name="Дата создания вопроса"
+        auto_now_add=True, db_index=True, verbose_name="Дата создания вопроса"
     )
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Дата удаления"
+    )
+
+    objects = LiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = "Вопрос"
         verbose_name_plural = "Вопросы"
+        indexes = [
+            models.Index(fields=["id"], condition=LIVE, name="question_live_idx"),
+            models.Index(
+                fields=["deleted_at"], condition=DELETED, name="question_deleted_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Вопрос: {self.text[:50]}..."
@@ -38,10 +87,46 @@ class Question(models.Model):
         else:
             logger.debug(f"Обновлен вопрос: ID {self.id}")
 
-    def delete(self, *args, **kwargs):
-        """Переопределение метода delete с логированием"""
+    def delete(self, using=None, keep_parents=False):
+        """
+        Переопределение метода delete с логированием.
+
+        Ответы удаляются пачками по QUESTION_DELETE_CHUNK_SIZE прямыми DELETE,
+        без сборщика Django, который загружает все связанные объекты в память
+        и отправляет сигналы по каждой строке. Ответы и вопрос удаляются в
+        одной транзакции, потребление памяти не зависит от числа ответов.
+        """
+        if self.pk is None:
+            raise ValueError("Нельзя удалить вопрос без ID")
+        using = using or router.db_for_write(self.__class__, instance=self)
         logger.warning(f"Удаление вопроса: ID {self.id}, текст: {self.text[:50]}...")
-        super().delete(*args, **kwargs)
+
+        answers = Answer.all_objects.using(using).filter(question_id=self.pk)
+        with transaction.atomic(using=using):
+            answers_deleted = delete_in_chunks(
+                answers, settings.QUESTION_DELETE_CHUNK_SIZE, using
+            )
+            questions_deleted = Question.all_objects.filter(pk=self.pk)._raw_delete(
+                using
+            )
+
+        logger.info(f"Удален вопрос ID {self.id}, удалено ответов: {answers_deleted}")
+        self.pk = None
+        return answers_deleted + questions_deleted, {
+            Answer._meta.label: answers_deleted,
+            Question._meta.label: questions_deleted,
+        }
+
+    def soft_delete(self):
+        """
+        Мягкое удаление вопроса: одна UPDATE без удаления ответов.
+
+        Ответы удаленного вопроса скрываются представлениями, физически
+        вопрос и ответы удаляет команда purge_deleted.
+        """
+        self.deleted_at = timezone.now()
+        Question.all_objects.filter(pk=self.pk).update(deleted_at=self.deleted_at)
+        logger.warning(f"Вопрос ID {self.id} помечен удаленным")
 
 
 class Answer(models.Model):
@@ -53,6 +138,7 @@ class Answer(models.Model):
         user_id (UUIDField): Идентификатор пользователя
         text (TextField): Текст ответа
         created_at (DateTimeField): Дата и время создания ответа
+        deleted_at (DateTimeField): Дата и время мягкого удаления
     """
 
     question = models.ForeignKey(
@@ -60,32 +146,93 @@ class Answer(models.Model):
         on_delete=models.CASCADE,
         related_name="answers",
         verbose_name="Вопрос",
+        db_index=False,
     )
     user_id = models.UUIDField(
         default=uuid.uuid4, editable=False, verbose_name="ID пользователя"
     )
     text = models.TextField(verbose_name="Текст ответа")
     created_at = models.DateTimeField(
-        auto_now_add=True, verbose_name="Дата создания ответа"
+        auto_now_add=True, db_index=True, verbose_name="Дата создания ответа"
+    )
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Дата удаления"
     )
 
+    objects = LiveManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = "Ответ"
         verbose_name_plural = "Ответы"
+        indexes = [
+            # покрывает выборку ответов вопроса по порядку и дельту since_id;
+            # не частичный, так как нужен и для удаления ответов вопроса
+            models.Index(fields=["question", "id"], name="answer_question_id_idx"),
+            models.Index(
+                fields=["deleted_at"], condition=DELETED, name="answer_deleted_idx"
+            ),
+        ]
 
     def __str__(self):
-        return f"Ответ на вопрос {self.question.id}: {self.text[:50]}..."
+        return f"Ответ на вопрос {self.question_id}: {self.text[:50]}..."
 
     def save(self, *args, **kwargs):
-        """Переопределение метода save с логированием"""
+        """
+        Переопределение метода save с логированием.
+
+        О новом ответе после фиксации транзакции публикуется событие
+        для SSE-подписчиков вопроса, а ответ учитывается в рейтинге вопросов.
+        """
         is_new = self._state.adding
         super().save(*args, **kwargs)
         if is_new:
             logger.info(
                 f"Создан новый ответ: ID {self.id}, вопрос ID {self.question_id}, пользователь: {self.user_id}"
             )
+            transaction.on_commit(lambda: publish_answer(self), using=self._state.db)
+            transaction.on_commit(lambda: record_answer(self), using=self._state.db)
 
     def delete(self, *args, **kwargs):
         """Переопределение метода delete с логированием"""
         logger.warning(f"Удаление ответа: ID {self.id}, вопрос ID {self.question_id}")
         super().delete(*args, **kwargs)
+
+    def soft_delete(self):
+        """Мягкое удаление ответа, физически его удаляет команда purge_deleted"""
+        self.deleted_at = timezone.now()
+        Answer.all_objects.filter(pk=self.pk).update(deleted_at=self.deleted_at)
+        logger.warning(f"Ответ ID {self.id} помечен удаленным")
+
+
+class IdempotencyKey(models.Model):
+    """
+    Сохраненный ответ на POST запрос с заголовком Idempotency-Key.
+
+    Attributes:
+        key_hash (CharField): SHA-256 от пути запроса и ключа идемпотентности
+        request_hash (CharField): SHA-256 тела запроса
+        status_code (PositiveSmallIntegerField): Код сохраненного ответа
+            (0, пока запрос с этим ключом выполняется)
+        content_type (CharField): Content-Type сохраненного ответа
+        body (BinaryField): Тело сохраненного ответа
+        created_at (DateTimeField): Дата и время сохранения
+    """
+
+    key_hash = models.CharField(
+        max_length=64, primary_key=True, verbose_name="Хеш ключа"
+    )
+    request_hash = models.CharField(max_length=64, verbose_name="Хеш запроса")
+    status_code = models.PositiveSmallIntegerField(verbose_name="Код ответа")
+    content_type = models.CharField(max_length=100, verbose_name="Тип ответа")
+    body = models.BinaryField(verbose_name="Тело ответа")
+    created_at = models.DateTimeField(
+        auto_now_add=True, db_index=True, verbose_name="Дата сохранения"
+    )
+
+    class Meta:
+        verbose_name = "Ключ идемпотентности"
+        verbose_name_plural = "Ключи идемпотентности"
+
+    def __str__(self):
+        return f"Ключ идемпотентности {self.key_hash[:12]}..."
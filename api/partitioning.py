@@ -0,0 +1,278 @@
+"""
+Помесячное секционирование таблицы ответов (PostgreSQL).
+
+Секционирование включается настройкой ANSWER_PARTITIONING и работает только
+на PostgreSQL: команда answer_partitions --convert переводит таблицу
+api_answer на секционирование по created_at (PARTITION BY RANGE), по одной
+секции на месяц. Модель Answer и представления при этом не меняются -
+PostgreSQL сам направляет строки в нужную секцию. Ответы, для месяца которых
+секции нет (задание answer_partitions не запускалось вовремя), попадают в
+секцию по умолчанию и переносятся в месячные секции при следующем запуске.
+На остальных СУБД (SQLite в тестах) все функции модуля ничего не делают.
+"""
+
+import gzip
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLE = "api_answer"
+PARTITION_PREFIX = f"{TABLE}_p"
+DEFAULT_PARTITION = f"{TABLE}_default"
+SEQUENCE = f"{TABLE}_partitioned_id_seq"
+
+
+def is_enabled(connection: BaseDatabaseWrapper) -> bool:
+    """Проверяет, включено ли секционирование для данного подключения"""
+    return settings.ANSWER_PARTITIONING and connection.vendor == "postgresql"
+
+
+def month_start(value: date) -> date:
+    """Первое число месяца для даты"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Сдвигает первое число месяца на months месяцев"""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Имя секции для месяца, например api_answer_p2025_08"""
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Месяц секции по ее имени или None для чужих таблиц"""
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX) :], "%Y_%m").date()
+    except ValueError:
+        return None
+
+
+def create_partition_sql(month: date) -> str:
+    """SQL создания секции для месяца (границы - [month, month + 1))"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') "
+        f"TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def create_partition(cursor, month: date) -> int:
+    """
+    Создает секцию месяца, если ее еще нет, и возвращает число перенесенных
+    в нее ответов.
+
+    PostgreSQL не создает секцию, строки которой уже лежат в секции по
+    умолчанию, поэтому секция по умолчанию на время создания отсоединяется,
+    а ответы месяца переносятся в новую секцию. Вызывается в транзакции.
+    """
+    name = partition_name(month)
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    if cursor.fetchone()[0]:
+        return 0
+    cursor.execute(
+        f"SELECT count(*) FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= %s AND created_at < %s",
+        bounds,
+    )
+    moved = cursor.fetchone()[0]
+    if not moved:
+        cursor.execute(create_partition_sql(month))
+        return 0
+
+    cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+    cursor.execute(create_partition_sql(month))
+    cursor.execute(
+        f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} "
+        "WHERE created_at >= %s AND created_at < %s",
+        bounds,
+    )
+    cursor.execute(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s",
+        bounds,
+    )
+    cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    logger.warning(
+        f"Ответов месяца {month:%Y-%m} в секции по умолчанию: {moved}, "
+        f"перенесены в {name}"
+    )
+    return moved
+
+
+def default_partition_rows(connection: BaseDatabaseWrapper) -> int:
+    """Число ответов в секции по умолчанию (0, если ее нет)"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [DEFAULT_PARTITION])
+        if not cursor.fetchone()[0]:
+            return 0
+        cursor.execute(f"SELECT count(*) FROM {DEFAULT_PARTITION}")
+        return cursor.fetchone()[0]
+
+
+def is_partitioned(connection: BaseDatabaseWrapper) -> bool:
+    """Проверяет, секционирована ли уже таблица ответов"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(connection: BaseDatabaseWrapper) -> list[str]:
+    """Имена секций таблицы ответов, отсортированные по месяцу"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s ORDER BY c.relname",
+            [TABLE],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def convert_to_partitioned(connection: BaseDatabaseWrapper, ahead: int = 3) -> None:
+    """
+    Переводит существующую таблицу api_answer на секционирование по месяцам.
+
+    Создает секционированную копию таблицы (первичный ключ - (id, created_at),
+    как того требует PostgreSQL), секции от самого старого ответа до ahead
+    месяцев вперед и секцию по умолчанию, переносит данные, удаляет старую
+    таблицу и создает заново ее индексы. Вызывается в транзакции.
+    """
+    if not is_enabled(connection) or is_partitioned(connection):
+        return
+
+    legacy = f"{TABLE}_unpartitioned"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT i.indexdef FROM pg_indexes i "
+            "JOIN pg_index x ON x.indexrelid = i.indexname::regclass "
+            "WHERE i.tablename = %s AND NOT x.indisunique",
+            [TABLE],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {legacy}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE} OWNED BY {TABLE}.id")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')"
+        )
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_question_id_fk "
+            "FOREIGN KEY (question_id) REFERENCES api_question (id) "
+            "DEFERRABLE INITIALLY DEFERRED"
+        )
+
+        cursor.execute(f"SELECT min(created_at) FROM {legacy}")
+        oldest = cursor.fetchone()[0]
+        current = month_start(timezone.now().date())
+        month = month_start(oldest.date()) if oldest else current
+        while month <= add_months(current, ahead):
+            cursor.execute(create_partition_sql(month))
+            month = add_months(month, 1)
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {legacy}")
+        cursor.execute(
+            f"SELECT setval('{SEQUENCE}', COALESCE(max(id), 0) + 1, false) FROM {TABLE}"
+        )
+        cursor.execute(f"DROP TABLE {legacy}")
+        # индексы старой таблицы (кроме первичного ключа) удалены вместе с ней
+        for indexdef in indexes:
+            cursor.execute(indexdef)
+    logger.info(f"Таблица {TABLE} переведена на помесячное секционирование")
+
+
+def create_future_partitions(connection: BaseDatabaseWrapper, ahead: int) -> list[str]:
+    """
+    Создает секции на текущий и ahead следующих месяцев, возвращает их имена.
+
+    Если в секции по умолчанию есть ответы прошлых месяцев, секции создаются
+    начиная с месяца самого старого из них, и ответы переносятся в них.
+    """
+    if not is_enabled(connection):
+        return []
+    current = month_start(timezone.now().date())
+    created = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+            f"PARTITION OF {TABLE} DEFAULT"
+        )
+        cursor.execute(f"SELECT min(created_at) FROM {DEFAULT_PARTITION}")
+        oldest = cursor.fetchone()[0]
+        month = min(current, month_start(oldest.date())) if oldest else current
+        while month <= add_months(current, ahead):
+            create_partition(cursor, month)
+            created.append(partition_name(month))
+            month = add_months(month, 1)
+    return created
+
+
+def archive_partition(
+    connection: BaseDatabaseWrapper, name: str, archive_dir: Path
+) -> Path:
+    """
+    Отсоединяет секцию, выгружает ее в сжатый CSV и удаляет таблицу.
+
+    Все шаги выполняются в одной транзакции. Файл сначала пишется во
+    временный, синхронизируется на диск и только затем переименовывается,
+    поэтому таблица удаляется лишь после того, как архив сохранен.
+    """
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    target = archive_dir / f"{name}.csv.gz"
+    partial = target.with_suffix(".gz.partial")
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+        copy_sql = f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)"
+        with gzip.open(partial, "wb") as file:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):
+                raw.copy_expert(copy_sql, file)
+            else:
+                with raw.copy(copy_sql) as copy:
+                    for chunk in copy:
+                        file.write(chunk)
+        with open(partial, "rb") as file:
+            os.fsync(file.fileno())
+        partial.rename(target)
+        cursor.execute(f"DROP TABLE {name}")
+
+    logger.warning(f"Секция {name} отсоединена и сохранена в архив {target}")
+    return target
+
+
+def archive_old_partitions(
+    connection: BaseDatabaseWrapper, keep_months: int, archive_dir: Path
+) -> list[Path]:
+    """Архивирует секции старше keep_months месяцев от текущего"""
+    if not is_enabled(connection):
+        return []
+    boundary = add_months(month_start(timezone.now().date()), -keep_months)
+    archived = []
+    for name in list_partitions(connection):
+        month = partition_month(name)
+        if month is not None and month < boundary:
+            archived.append(archive_partition(connection, name, archive_dir))
+    return archived
@@ -2,10 +2,21 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
-class AnswerBase(BaseModel):
+class Schema(BaseModel):
+    """
+    Базовая схема.
+
+    Валидатор схемы строится при первом использовании, а не при импорте
+    модуля, что сокращает время запуска процесса.
+    """
+
+    model_config = ConfigDict(defer_build=True)
+
+
+class AnswerBase(Schema):
     text: str = Field(..., min_length=1, max_length=1000, description="Текст ответа")
 
 
@@ -14,16 +25,15 @@ class AnswerCreate(AnswerBase):
 
 
 class AnswerResponse(AnswerBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     question_id: int
     user_id: UUID
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
-class QuestionBase(BaseModel):
+class QuestionBase(Schema):
     text: str = Field(..., min_length=1, max_length=1000, description="Текст вопроса")
 
 
@@ -32,9 +42,8 @@ class QuestionCreate(QuestionBase):
 
 
 class QuestionResponse(QuestionBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     created_at: datetime
     answers: Optional[List[AnswerResponse]] = []
-
-    class Config:
-        from_attributes = True
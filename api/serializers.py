@@ -5,7 +5,6 @@ from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
 from api.models import Answer, Question
-from api.schemas import AnswerCreate
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +15,7 @@ class AnswerSerializer(ModelSerializer):
     Используется для чтения данных ответов.
     """
 
-    question_id = serializers.IntegerField(source="question.id", read_only=True)
+    question_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Answer
@@ -53,6 +52,9 @@ class AnswerCreateSerializer(ModelSerializer):
 
     def to_internal_value(self, data: dict[str, Any]) -> dict[str, Any]:
         """Преобразовывает в схему Pydantic для валидации"""
+        # импорт здесь: pydantic загружается при первой валидации, а не при запуске
+        from api.schemas import AnswerCreate
+
         try:
             validated_data = AnswerCreate(**data).model_dump(exclude_unset=True)
         except Exception as e:
@@ -1,11 +1,23 @@
 import uuid
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
+from api import trending
 from api.models import Answer, Question
 
 
+@pytest.fixture(autouse=True)
+def trending_settings(settings, tmp_path, monkeypatch):
+    """Рейтинг вопросов без фонового потока, со снимком во временном каталоге"""
+    settings.TRENDING_REFRESH_INTERVAL = 0
+    settings.TRENDING_SNAPSHOT_PATH = tmp_path / "trending.json"
+    monkeypatch.setattr(trending, "_trending", None)
+    return settings
+
+
 @pytest.fixture
 def api_client():
     """Фикстура для API клиента"""
@@ -24,3 +36,32 @@ def test_answer(test_question):
     return Answer.objects.create(
         question=test_question, user_id=uuid.uuid4(), text="Тестовый ответ на вопрос"
     )
+
+
+@pytest.fixture
+def assert_queries_do_not_scale():
+    """
+    Фикстура-защита от N+1 запросов.
+
+    Возвращает функцию check(populate, call, size), которая дважды наполняет
+    базу через populate(n) (при n = size и n = 2 * size), выполняет call(target)
+    для объекта, возвращенного populate, и сравнивает число SQL-запросов.
+    Тест падает, если число запросов растет вместе с объемом данных.
+    """
+
+    def check(populate, call, size=5):
+        counts = []
+        for n in (size, 2 * size):
+            target = populate(n)
+            with CaptureQueriesContext(connection) as context:
+                call(target)
+            counts.append(len(context.captured_queries))
+            queries = [query["sql"] for query in context.captured_queries]
+
+        assert counts[0] == counts[1], (
+            f"Число запросов растет с объемом данных: {counts[0]} при n={size}, "
+            f"{counts[1]} при n={2 * size}. Запросы:\n" + "\n".join(queries)
+        )
+        return counts[1]
+
+    return check
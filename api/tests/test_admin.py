@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+
+from api.admin import ESTIMATED_COUNT_THRESHOLD, EstimatedCountPaginator
+from api.models import Answer, Question
+
+
+@pytest.mark.django_db
+class TestAdmin:
+    """Тесты административного интерфейса"""
+
+    def test_answer_changelist_does_not_scale_queries(
+        self, admin_client, assert_queries_do_not_scale
+    ):
+        """Тест того, что список ответов не делает запрос на каждый вопрос"""
+
+        def populate(n):
+            questions = Question.objects.bulk_create(
+                [Question(text=f"Вопрос {i}") for i in range(n)]
+            )
+            Answer.objects.bulk_create(
+                [Answer(question=question, text="Ответ") for question in questions]
+            )
+
+        def request(_):
+            response = admin_client.get(reverse("admin:api_answer_changelist"))
+            assert response.status_code == 200
+
+        assert_queries_do_not_scale(populate, request)
+
+    def test_search_finds_question(self, admin_client):
+        """Тест поиска вопросов по тексту"""
+        Question.objects.create(text="Как настроить индекс")
+        Question.objects.create(text="Другой вопрос")
+
+        response = admin_client.get(
+            reverse("admin:api_question_changelist"), {"q": "индекс"}
+        )
+
+        assert response.status_code == 200
+        assert [q.text for q in response.context["cl"].result_list] == [
+            "Как настроить индекс"
+        ]
+
+    def test_question_autocomplete(self, admin_client, test_question):
+        """Тест автодополнения вопросов для поля question у ответа"""
+        response = admin_client.get(
+            reverse("admin:autocomplete"),
+            {
+                "term": "Тестовый",
+                "app_label": "api",
+                "model_name": "answer",
+                "field_name": "question",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json()["results"][0]["id"] == str(test_question.id)
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPaginator:
+    """Тесты пагинатора с оценкой числа строк"""
+
+    def test_exact_count_outside_postgresql(self, test_question):
+        """Тест точного подсчета на SQLite"""
+        paginator = EstimatedCountPaginator(Question.objects.all(), 10)
+        assert paginator.count == 1
+
+    def test_estimate_for_large_unfiltered_table(self, test_question):
+        """Тест использования оценки для большой таблицы без фильтров"""
+        estimate = ESTIMATED_COUNT_THRESHOLD * 10
+        with (
+            patch("api.admin.connections") as connections,
+            patch.object(EstimatedCountPaginator, "_estimate", return_value=estimate),
+        ):
+            connections.__getitem__.return_value.vendor = "postgresql"
+            assert EstimatedCountPaginator(Question.objects.all(), 10).count == estimate
+            filtered = Question.objects.filter(pk=test_question.pk)
+            assert EstimatedCountPaginator(filtered, 10).count == 1
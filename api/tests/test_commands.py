@@ -0,0 +1,113 @@
+import pytest
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS
+from django.test import override_settings
+from django.utils import timezone
+
+from api.management.commands import purge_deleted
+from api.models import Answer, Question, delete_in_chunks
+
+
+@pytest.mark.django_db
+class TestSeedQaCommand:
+    """Тесты для команды seed_qa"""
+
+    def _snapshot(self):
+        questions = list(Question.objects.order_by("id").values_list("text", flat=True))
+        answers = list(
+            Answer.objects.order_by("id").values_list("user_id", "text", flat=False)
+        )
+        return questions, answers
+
+    def test_seed_creates_questions_and_answers(self):
+        """Тест генерации вопросов и ответов"""
+        call_command("seed_qa", questions=50, batch_size=7, seed=1)
+
+        assert Question.objects.count() == 50
+        assert Answer.objects.exists()
+        assert all(
+            1 <= len(text) <= 1000
+            for text in Answer.objects.values_list("text", flat=True)
+        )
+
+    def test_seed_is_reproducible(self):
+        """Тест того, что одинаковый seed дает одинаковые данные"""
+        call_command("seed_qa", questions=30, batch_size=10, seed=42)
+        first = self._snapshot()
+        Question.objects.all().delete()
+
+        call_command("seed_qa", questions=30, batch_size=10, seed=42)
+        assert self._snapshot() == first
+
+    def test_max_answers_limits_skew(self):
+        """Тест ограничения числа ответов на один вопрос"""
+        call_command("seed_qa", questions=200, max_answers=3, alpha=0.5, seed=3)
+
+        counts = Answer.objects.values_list("question_id", flat=True)
+        assert max(list(counts).count(qid) for qid in set(counts)) <= 3
+
+
+@pytest.mark.django_db
+class TestPurgeDeletedCommand:
+    """Тесты для команды purge_deleted"""
+
+    def test_purge_removes_soft_deleted_rows(self, test_question):
+        """Тест физического удаления мягко удаленных вопросов и ответов"""
+        Answer.objects.bulk_create(
+            [Answer(question=test_question, text=f"Ответ {i}") for i in range(5)]
+        )
+        live_question = Question.objects.create(text="Живой вопрос")
+        deleted_answer = Answer.objects.create(question=live_question, text="Ответ")
+        live_answer = Answer.objects.create(question=live_question, text="Ответ")
+        test_question.soft_delete()
+        deleted_answer.soft_delete()
+
+        call_command("purge_deleted", batch_size=2, pause=0)
+
+        assert list(Question.all_objects.all()) == [live_question]
+        assert list(Answer.all_objects.all()) == [live_answer]
+
+    def test_purge_respects_grace_period(self, test_question):
+        """Тест того, что недавно удаленные записи не очищаются раньше срока"""
+        test_question.soft_delete()
+
+        call_command("purge_deleted", older_than=3600, pause=0)
+
+        assert Question.all_objects.filter(id=test_question.id).exists()
+
+    def test_purge_removes_answers_inserted_during_purge(
+        self, test_question, monkeypatch
+    ):
+        """Тест того, что ответ, вставленный во время очистки, не остается без вопроса"""
+        test_question.soft_delete()
+
+        def delete_then_insert(queryset, chunk_size, using, pause=0.0):
+            deleted = delete_in_chunks(queryset, chunk_size, using, pause)
+            if pause and queryset.model is Answer:
+                Answer.all_objects.create(question=test_question, text="Поздний ответ")
+            return deleted
+
+        monkeypatch.setattr(purge_deleted, "delete_in_chunks", delete_then_insert)
+
+        call_command("purge_deleted", pause=0.001)
+
+        assert not Question.all_objects.exists()
+        assert not Answer.all_objects.exists()
+
+    @override_settings(
+        DATABASE_ROUTERS=["api.db_routers.ReplicaRouter"],
+        DATABASE_REPLICAS={"replica": 1},
+    )
+    @pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, "replica"])
+    def test_purge_deletes_on_primary_with_replicas(self):
+        """Тест того, что при настроенных репликах очищается основная база"""
+        for alias in (DEFAULT_DB_ALIAS, "replica"):
+            question = Question.objects.using(alias).create(text="Вопрос")
+            Answer.objects.using(alias).create(question=question, text="Ответ")
+            Question.all_objects.using(alias).update(deleted_at=timezone.now())
+
+        call_command("purge_deleted", batch_size=2, pause=0)
+
+        assert not Question.all_objects.using(DEFAULT_DB_ALIAS).exists()
+        assert not Answer.all_objects.using(DEFAULT_DB_ALIAS).exists()
+        assert Question.all_objects.using("replica").exists()
@@ -0,0 +1,250 @@
+import importlib
+import os
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+import config.wsgi
+from api import dedup
+from api.dedup import NUM_PERM, IndexBuilder, QuestionIndex, signature
+from api.models import Question
+
+QUESTION = "Как настроить пул соединений PostgreSQL в Django 5.2?"
+REPOST = "как настроить пул соединений postgresql в django 5.2"
+OTHER = "Почему тесты падают на CI, а локально проходят?"
+
+
+def similarity(a, b):
+    return sum(x == y for x, y in zip(signature(a), signature(b))) / NUM_PERM
+
+
+@pytest.fixture
+def dedup_settings(settings, tmp_path, monkeypatch):
+    """Включенный поиск дубликатов с индексом во временном каталоге"""
+    settings.QUESTION_DEDUP = True
+    settings.QUESTION_DEDUP_THRESHOLD = 0.8
+    settings.QUESTION_DEDUP_INDEX_PATH = tmp_path / "questions.bin"
+    settings.QUESTION_DEDUP_SAVE_INTERVAL = 0
+    monkeypatch.setattr(dedup, "_index", None)
+    monkeypatch.setattr(dedup, "_builder", None)
+    return settings
+
+
+def test_signature_estimates_similarity():
+    """Тест того, что сигнатуры отличают повтор от другого вопроса"""
+    assert similarity(QUESTION, QUESTION) == 1.0
+    assert similarity(QUESTION, REPOST) == 1.0
+    assert similarity(QUESTION, QUESTION.replace("5.2", "5.1")) > 0.8
+    assert similarity(QUESTION, OTHER) < 0.3
+
+
+class TestQuestionIndex:
+    """Тесты индекса вопросов"""
+
+    def test_query(self, tmp_path):
+        """Тест поиска похожих вопросов"""
+        index = QuestionIndex(tmp_path / "index.bin")
+        index.add(1, QUESTION)
+        index.add(2, OTHER)
+
+        assert index.query(REPOST, 0.8) == [(1, 1.0)]
+        assert index.query("Совсем другой текст про кэширование", 0.8) == []
+
+    def test_add_skips_indexed_ids(self, tmp_path):
+        """Тест того, что уже проиндексированные вопросы не добавляются"""
+        index = QuestionIndex(tmp_path / "index.bin")
+        index.add(2, QUESTION)
+        index.add(2, QUESTION)
+
+        assert len(index) == 1
+        assert index.last_id == 2
+        assert 2 in index
+
+    def test_save_and_reopen(self, tmp_path):
+        """Тест записи индекса в файл и дописывания к открытому файлу"""
+        path = tmp_path / "index.bin"
+        index = QuestionIndex(path)
+        index.add(1, QUESTION)
+        index.save()
+        index.add(5, OTHER)
+
+        assert index.query(REPOST, 0.8) == [(1, 1.0)]
+        assert index.query(OTHER, 0.8) == [(5, 1.0)]
+
+        index.save()
+        reopened = QuestionIndex(path)
+
+        assert len(reopened) == 2
+        assert reopened.last_id == 5
+        assert 1 in reopened and 5 in reopened and 3 not in reopened
+        assert reopened.query(REPOST, 0.8) == [(1, 1.0)]
+        assert reopened.query(OTHER, 0.8) == [(5, 1.0)]
+
+    @pytest.mark.django_db
+    def test_sync_picks_up_late_commits(self, tmp_path):
+        """Тест индексации вопроса с меньшим ID, зафиксированного позже большего"""
+        first, late, last = Question.objects.bulk_create(
+            [Question(text=QUESTION), Question(text=OTHER), Question(text="Вопрос")]
+        )
+        index = QuestionIndex(tmp_path / "index.bin")
+        index.add(first.id, first.text)
+        index.add(last.id, last.text)
+
+        assert index.sync() == 1
+        assert late.id in index
+        assert index.query(OTHER, 0.8) == [(late.id, 1.0)]
+
+    def test_ignores_foreign_file(self, tmp_path):
+        """Тест того, что файл другого формата не открывается как индекс"""
+        path = tmp_path / "index.bin"
+        path.write_bytes(b"x" * 100)
+
+        index = QuestionIndex(path)
+
+        assert len(index) == 0
+        assert index.last_id == 0
+
+    def test_save_does_not_block_queries(self, tmp_path, monkeypatch):
+        """Тест того, что запись файла идет без блокировки индекса"""
+        index = QuestionIndex(tmp_path / "index.bin")
+        index.add(1, QUESTION)
+        fsync = os.fsync
+        locked = []
+
+        def add_during_write(fd):
+            locked.append(index._lock.locked())
+            index.add(5, OTHER)
+            fsync(fd)
+
+        monkeypatch.setattr(dedup.os, "fsync", add_during_write)
+        index.save()
+
+        assert locked == [False]
+        assert len(index) == 2 and index.unsaved == 1
+        assert index.query(OTHER, 0.8) == [(5, 1.0)]
+        assert len(QuestionIndex(index.path)) == 1
+
+    def test_single_writer(self, tmp_path):
+        """Тест того, что файл пишет один процесс, а остальные его перечитывают"""
+        path = tmp_path / "index.bin"
+        writer, reader = QuestionIndex(path), QuestionIndex(path)
+        reader.add(2, OTHER)
+
+        assert writer.acquire_writer()
+        assert not reader.acquire_writer()
+
+        writer.add(1, QUESTION)
+        writer.save()
+        assert reader.reload()
+        assert not reader.reload()
+        assert reader.query(REPOST, 0.8) == [(1, 1.0)]
+        assert reader.query(OTHER, 0.8) == [(2, 1.0)]
+        assert reader.unsaved == 1
+
+        writer.release_writer()
+        assert reader.acquire_writer()
+        reader.release_writer()
+
+
+@pytest.mark.django_db
+class TestDuplicateQuestions:
+    """Тесты отклонения почти одинаковых вопросов"""
+
+    def post(self, api_client, text):
+        return api_client.post(
+            reverse("api:question-list"), {"text": text}, format="json"
+        )
+
+    def test_repost_is_rejected(self, api_client, dedup_settings):
+        """Тест отклонения повтора вопроса со списком похожих"""
+        original = self.post(api_client, QUESTION)
+        response = self.post(api_client, REPOST)
+
+        assert original.status_code == 201
+        assert response.status_code == 409
+        assert response.data["duplicates"] == [
+            {"id": original.data["id"], "text": QUESTION, "similarity": 1.0}
+        ]
+        assert Question.objects.count() == 1
+
+    def test_different_question_is_created(self, api_client, dedup_settings):
+        """Тест создания непохожего вопроса"""
+        self.post(api_client, QUESTION)
+
+        assert self.post(api_client, OTHER).status_code == 201
+
+    def test_deleted_question_is_not_a_duplicate(self, api_client, dedup_settings):
+        """Тест того, что удаленный вопрос не мешает задать его снова"""
+        Question.objects.create(text=QUESTION)
+        self.post(api_client, OTHER)
+        Question.objects.get(text=QUESTION).soft_delete()
+
+        assert self.post(api_client, REPOST).status_code == 201
+
+    def test_invalid_text_is_validated_first(self, api_client, dedup_settings):
+        """Тест того, что некорректный текст отклоняется с 400, а не как дубликат"""
+        Question.objects.create(text="???")
+
+        response = self.post(api_client, "   ")
+
+        assert response.status_code == 400
+        assert "text" in response.data
+
+    def test_skipped_until_index_is_built(
+        self, api_client, dedup_settings, monkeypatch
+    ):
+        """Тест того, что пока индекс строится в фоне, вопросы принимаются"""
+        dedup_settings.QUESTION_DEDUP_SAVE_INTERVAL = 600
+        monkeypatch.setattr(IndexBuilder, "start", lambda builder: None)
+        Question.objects.create(text=QUESTION)
+
+        assert self.post(api_client, REPOST).status_code == 201
+
+        builder = IndexBuilder(dedup.get_index())
+        builder.stop()
+        builder.run()
+
+        assert dedup_settings.QUESTION_DEDUP_INDEX_PATH.exists()
+        assert self.post(api_client, REPOST).status_code == 409
+
+    def test_disabled(self, api_client, dedup_settings):
+        """Тест того, что при выключенной настройке дубликаты не ищутся"""
+        dedup_settings.QUESTION_DEDUP = False
+        self.post(api_client, QUESTION)
+
+        assert self.post(api_client, QUESTION).status_code == 201
+
+    def test_build_question_index(self, dedup_settings):
+        """Тест дописывания новых вопросов в файл индекса командой"""
+        first = Question.objects.create(text=QUESTION)
+        call_command("build_question_index")
+        second = Question.objects.create(text=OTHER)
+        call_command("build_question_index")
+
+        index = QuestionIndex(dedup_settings.QUESTION_DEDUP_INDEX_PATH)
+        assert len(index) == 2
+        assert index.last_id == second.id
+        assert index.query(REPOST, 0.8) == [(first.id, 1.0)]
+
+    def test_build_question_index_skipped_while_api_writes(
+        self, dedup_settings, capsys
+    ):
+        """Тест того, что команда не пишет файл, который ведет процесс API"""
+        api_index = QuestionIndex(dedup_settings.QUESTION_DEDUP_INDEX_PATH)
+        assert api_index.acquire_writer()
+        Question.objects.create(text=QUESTION)
+
+        call_command("build_question_index")
+
+        assert "команда пропущена" in capsys.readouterr().err
+        assert not dedup_settings.QUESTION_DEDUP_INDEX_PATH.exists()
+        api_index.release_writer()
+
+
+def test_wsgi_import_does_not_start_index(dedup_settings):
+    """Тест того, что импорт WSGI-приложения не запускает поток индекса"""
+    dedup_settings.QUESTION_DEDUP_SAVE_INTERVAL = 600
+    importlib.reload(config.wsgi)
+
+    assert dedup._builder is None
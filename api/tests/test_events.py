@@ -0,0 +1,170 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import DEFAULT_DB_ALIAS
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from api.events import LAGGED, InProcessBroker, get_broker
+from api.models import Answer, Question
+
+replica_settings = override_settings(
+    DATABASE_ROUTERS=["api.db_routers.ReplicaRouter"],
+    DATABASE_REPLICAS={"replica": 1},
+)
+
+
+def parse_events(chunks):
+    """Разбирает SSE-чанки в список данных событий answer"""
+    events = []
+    for chunk in chunks:
+        for block in chunk.split("\n\n"):
+            lines = dict(
+                line.split(": ", 1) for line in block.splitlines() if ": " in line
+            )
+            if lines.get("event") == "answer":
+                events.append(json.loads(lines["data"]))
+    return events
+
+
+async def read_stream(url, count, headers=None, on_subscribed=None):
+    """Читает первые count чанков потока, затем закрывает соединение"""
+    response = await AsyncClient().get(url, headers=headers or {})
+    chunks = []
+    stream = aiter(response.streaming_content)
+    while len(chunks) < count:
+        chunks.append((await anext(stream)).decode())
+        if len(chunks) == 1 and on_subscribed is not None:
+            await on_subscribed()
+    await response.streaming_content.aclose()
+    return response, chunks
+
+
+def test_broker_delivers_to_subscribers_of_question():
+    """Тест доставки событий подписчикам нужного вопроса"""
+
+    async def run():
+        broker = InProcessBroker()
+        first = broker.subscribe(1)
+        other = broker.subscribe(2)
+        broker.publish(1, {"id": 10})
+        event = await asyncio.wait_for(first.get(), 1)
+        broker.unsubscribe(first)
+        broker.unsubscribe(other)
+        return event, other.queue.empty()
+
+    event, other_is_empty = async_to_sync(run)()
+
+    assert event == {"id": 10}
+    assert other_is_empty
+
+
+@override_settings(ANSWER_STREAM_QUEUE_SIZE=2)
+def test_slow_subscriber_gets_lagged_marker():
+    """Тест маркера отставания при переполнении очереди подписчика"""
+
+    async def run():
+        broker = InProcessBroker()
+        subscription = broker.subscribe(1)
+        for event_id in range(5):
+            broker.publish(1, {"id": event_id})
+        await asyncio.sleep(0)
+        lagged = await subscription.get()
+        broker.publish(1, {"id": 5})
+        return lagged, await asyncio.wait_for(subscription.get(), 1)
+
+    assert async_to_sync(run)() == (LAGGED, {"id": 5})
+
+
+@pytest.mark.django_db
+def test_stream_replays_answers_after_last_event_id(test_question):
+    """Тест дозагрузки ответов после Last-Event-ID"""
+    answers = [
+        Answer.objects.create(
+            question=test_question, user_id=uuid.uuid4(), text=f"Ответ {i}"
+        )
+        for i in range(3)
+    ]
+    url = reverse("api:answer-stream", kwargs={"question_id": test_question.id})
+
+    response, chunks = async_to_sync(read_stream)(
+        url, 3, headers={"Last-Event-ID": str(answers[0].id)}
+    )
+
+    assert response["Content-Type"] == "text/event-stream"
+    assert chunks[0].startswith("retry:")
+    assert [event["id"] for event in parse_events(chunks)] == [
+        answers[1].id,
+        answers[2].id,
+    ]
+
+
+@replica_settings
+@pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, "replica"])
+def test_stream_replays_from_primary_when_replica_lags(test_question):
+    """Тест того, что пропущенные ответы читаются из основной базы, а не из реплики"""
+    Question.objects.using("replica").create(id=test_question.id, text="Копия")
+    answer = Answer.objects.create(
+        question=test_question, user_id=uuid.uuid4(), text="Ответ не на реплике"
+    )
+    url = reverse("api:answer-stream", kwargs={"question_id": test_question.id})
+
+    _, chunks = async_to_sync(read_stream)(url, 2, headers={"Last-Event-ID": "0"})
+
+    assert [event["id"] for event in parse_events(chunks)] == [answer.id]
+
+
+@replica_settings
+@override_settings(ANSWER_STREAM_QUEUE_SIZE=1)
+@pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, "replica"])
+def test_lagged_stream_catches_up_from_primary(test_question):
+    """Тест того, что отставший подписчик догружает ответы из основной базы"""
+    Question.objects.using("replica").create(id=test_question.id, text="Копия")
+    answers = [
+        Answer.objects.create(
+            question=test_question, user_id=uuid.uuid4(), text=f"Ответ {i}"
+        )
+        for i in range(3)
+    ]
+    url = reverse("api:answer-stream", kwargs={"question_id": test_question.id})
+
+    async def overflow():
+        for answer in answers:
+            get_broker().publish(test_question.id, {"id": answer.id})
+        await asyncio.sleep(0)
+
+    _, chunks = async_to_sync(read_stream)(url, 4, on_subscribed=overflow)
+
+    assert [event["id"] for event in parse_events(chunks)] == [
+        answer.id for answer in answers
+    ]
+
+
+@pytest.mark.django_db
+def test_stream_pushes_new_answers(test_question, django_capture_on_commit_callbacks):
+    """Тест доставки ответа, созданного после подписки"""
+    url = reverse("api:answer-stream", kwargs={"question_id": test_question.id})
+
+    @sync_to_async
+    def create_answer():
+        with django_capture_on_commit_callbacks(execute=True):
+            Answer.objects.create(
+                question=test_question, user_id=uuid.uuid4(), text="Новый ответ"
+            )
+
+    _, chunks = async_to_sync(read_stream)(url, 2, on_subscribed=create_answer)
+
+    events = parse_events(chunks)
+    assert [event["text"] for event in events] == ["Новый ответ"]
+    assert events[0]["question_id"] == test_question.id
+    assert get_broker()._subscriptions == {}
+
+
+@pytest.mark.django_db
+def test_stream_for_missing_question(api_client):
+    """Тест подписки на несуществующий вопрос"""
+    url = reverse("api:answer-stream", kwargs={"question_id": 999})
+    assert api_client.get(url).status_code == 404
@@ -0,0 +1,201 @@
+import hashlib
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from api.idempotency import IN_PROGRESS
+from api.ingest import AnswerBuffer, get_buffer
+from api.models import Answer, IdempotencyKey, Question
+from api.views import AnswerCreateView
+
+
+def reserve(key, path="/api/questions/"):
+    """Резерв ключа, как у запроса, который еще выполняется"""
+    key_hash = hashlib.sha256(f"{path}\n{key}".encode()).hexdigest()
+    return IdempotencyKey.objects.create(
+        key_hash=key_hash,
+        request_hash="",
+        status_code=IN_PROGRESS,
+        content_type="",
+        body=b"",
+    )
+
+
+@pytest.mark.django_db
+class TestIdempotencyKey:
+    """Тесты поддержки заголовка Idempotency-Key"""
+
+    def test_retry_replays_original_response(self, api_client):
+        """Тест того, что повтор запроса не создает второй вопрос"""
+        url = reverse("api:question-list")
+        headers = {"Idempotency-Key": "retry-1"}
+        first = api_client.post(url, {"text": "Вопрос"}, format="json", headers=headers)
+        second = api_client.post(
+            url, {"text": "Вопрос"}, format="json", headers=headers
+        )
+
+        assert first.status_code == second.status_code == 201
+        assert second.content == first.content
+        assert second["Idempotent-Replayed"] == "true"
+        assert Question.objects.count() == 1
+
+    def test_retry_of_answer_create(self, api_client, test_question):
+        """Тест повтора запроса на создание ответа"""
+        url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+        headers = {"Idempotency-Key": "answer-retry"}
+        for _ in range(3):
+            response = api_client.post(
+                url, {"text": "Ответ"}, format="json", headers=headers
+            )
+            assert response.status_code == 201
+
+        assert Answer.objects.count() == 1
+
+    def test_same_key_with_other_body_is_rejected(self, api_client):
+        """Тест повторного использования ключа для другого запроса"""
+        url = reverse("api:question-list")
+        headers = {"Idempotency-Key": "reused"}
+        api_client.post(url, {"text": "Первый"}, format="json", headers=headers)
+        response = api_client.post(
+            url, {"text": "Второй"}, format="json", headers=headers
+        )
+
+        assert response.status_code == 422
+        assert Question.objects.count() == 1
+
+    def test_failed_request_is_not_stored(self, api_client):
+        """Тест того, что ответы с ошибкой не сохраняются и запрос можно исправить"""
+        url = reverse("api:question-list")
+        headers = {"Idempotency-Key": "fix-and-retry"}
+        response = api_client.post(url, {"text": ""}, format="json", headers=headers)
+        assert response.status_code == 400
+        assert not IdempotencyKey.objects.exists()
+
+    def test_expired_key_is_not_replayed(self, api_client):
+        """Тест того, что ключ с истекшим сроком хранения не используется"""
+        url = reverse("api:question-list")
+        headers = {"Idempotency-Key": "expired"}
+        api_client.post(url, {"text": "Вопрос"}, format="json", headers=headers)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        response = api_client.post(
+            url, {"text": "Вопрос"}, format="json", headers=headers
+        )
+
+        assert "Idempotent-Replayed" not in response
+        assert Question.objects.count() == 2
+
+    def test_request_in_progress_is_rejected(self, api_client):
+        """Тест ответа 409 на повтор запроса, который еще выполняется"""
+        reserve("in-progress")
+
+        response = api_client.post(
+            reverse("api:question-list"),
+            {"text": "Вопрос"},
+            format="json",
+            headers={"Idempotency-Key": "in-progress"},
+        )
+
+        assert response.status_code == 409
+        assert response["Retry-After"] == "1"
+        assert not Question.objects.exists()
+
+    def test_abandoned_reservation_expires(self, api_client):
+        """Тест того, что резерв упавшего запроса не блокирует повторы навсегда"""
+        reserve("abandoned")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(minutes=2))
+
+        response = api_client.post(
+            reverse("api:question-list"),
+            {"text": "Вопрос"},
+            format="json",
+            headers={"Idempotency-Key": "abandoned"},
+        )
+
+        assert response.status_code == 201
+        assert IdempotencyKey.objects.get().status_code == 201
+
+    def test_write_error_is_not_replayed(self, api_client, test_question, monkeypatch):
+        """Тест того, что ошибка целостности самой записи не выдается за повтор"""
+
+        def fail(self, serializer):
+            raise IntegrityError("ошибка записи ответа")
+
+        monkeypatch.setattr(AnswerCreateView, "perform_create", fail)
+        url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+
+        with pytest.raises(IntegrityError, match="ошибка записи ответа"):
+            api_client.post(
+                url, {"text": "Ответ"}, format="json", headers={"Idempotency-Key": "k"}
+            )
+        assert not IdempotencyKey.objects.exists()
+
+    def test_write_behind_enqueues_after_key_is_reserved(
+        self, api_client, test_question, tmp_path, monkeypatch
+    ):
+        """Тест того, что ответ ставится в буфер только после записи ключа"""
+        url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+        key_hash = hashlib.sha256(f"{url}\nbuffered".encode()).hexdigest()
+        reserved = []
+        enqueue = AnswerBuffer.enqueue
+
+        def checked_enqueue(buffer, *args):
+            reserved.append(IdempotencyKey.objects.filter(pk=key_hash).exists())
+            return enqueue(buffer, *args)
+
+        monkeypatch.setattr(AnswerBuffer, "enqueue", checked_enqueue)
+        with override_settings(
+            ANSWER_WRITE_BEHIND=True,
+            ANSWER_BUFFER_PATH=tmp_path / "buffer.sqlite3",
+            ANSWER_FLUSH_INTERVAL=0,
+        ):
+            for _ in range(2):
+                response = api_client.post(
+                    url,
+                    {"text": "Ответ"},
+                    format="json",
+                    headers={"Idempotency-Key": "buffered"},
+                )
+                assert response.status_code == 202
+            pending = get_buffer().claim(limit=10, lease=30)
+
+        assert reserved == [True]
+        assert len(pending) == 1
+
+    def test_request_without_key_does_not_query_store(self, api_client):
+        """Тест того, что запросы без ключа не обращаются к хранилищу ключей"""
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post(
+                reverse("api:question-list"), {"text": "Вопрос"}, format="json"
+            )
+
+        assert response.status_code == 201
+        table = IdempotencyKey._meta.db_table
+        assert not any(table in query["sql"] for query in context.captured_queries)
+
+
+@override_settings(
+    DATABASE_ROUTERS=["api.db_routers.ReplicaRouter"],
+    DATABASE_REPLICAS={"replica": 1},
+)
+@pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, "replica"])
+def test_purge_removes_expired_keys_on_primary():
+    """Тест удаления истекших ключей в основной базе при настроенных репликах"""
+    for alias in (DEFAULT_DB_ALIAS, "replica"):
+        IdempotencyKey.objects.using(alias).create(
+            key_hash=alias, request_hash="", status_code=201, content_type="", body=b""
+        )
+        IdempotencyKey.objects.using(alias).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+
+    call_command("purge_deleted", pause=0)
+
+    assert not IdempotencyKey.objects.using(DEFAULT_DB_ALIAS).exists()
+    assert IdempotencyKey.objects.using("replica").exists()
@@ -0,0 +1,158 @@
+import time
+import uuid
+
+import pytest
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS
+from django.test import override_settings
+from django.urls import reverse
+
+from api import ingest
+from api.ingest import (STATUS_CREATED, STATUS_REJECTED, AnswerBuffer,
+                        BufferFull, flush_pending, get_buffer)
+from api.models import Answer, Question
+
+
+@pytest.fixture
+def write_behind(tmp_path):
+    """Фикстура, включающая режим отложенной записи ответов"""
+    with override_settings(
+        ANSWER_WRITE_BEHIND=True,
+        ANSWER_BUFFER_PATH=tmp_path / "buffer.sqlite3",
+        ANSWER_BUFFER_MAX_PENDING=2,
+        ANSWER_FLUSH_INTERVAL=0,
+    ):
+        yield get_buffer()
+
+
+@pytest.mark.django_db
+class TestWriteBehindAnswers:
+    """Тесты отложенной записи ответов"""
+
+    def test_post_returns_202_and_defers_insert(
+        self, api_client, test_question, write_behind
+    ):
+        """Тест того, что ответ принимается в буфер без записи в базу"""
+        url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+        response = api_client.post(url, {"text": "Отложенный ответ"}, format="json")
+
+        assert response.status_code == 202
+        assert response.data["status"] == "pending"
+        assert response["Location"].endswith(
+            f"/answers/pending/{response.data['ticket']}/"
+        )
+        assert Answer.objects.count() == 0
+
+        status_response = api_client.get(response["Location"])
+        assert status_response.data["status"] == "pending"
+
+    def test_flush_creates_answers(self, api_client, test_question, write_behind):
+        """Тест записи буфера в основную базу"""
+        url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+        response = api_client.post(url, {"text": "Отложенный ответ"}, format="json")
+
+        assert flush_pending(write_behind, batch_size=10, lease=30) == 1
+
+        answer = Answer.objects.get()
+        assert answer.text == "Отложенный ответ"
+        status_response = api_client.get(response["Location"])
+        assert status_response.data["status"] == STATUS_CREATED
+        assert status_response.data["answer_id"] == answer.id
+
+    def test_backpressure_when_buffer_full(
+        self, api_client, test_question, write_behind
+    ):
+        """Тест ответа 503 при заполненном буфере"""
+        url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+        for _ in range(2):
+            assert (
+                api_client.post(url, {"text": "Ответ"}, format="json").status_code
+                == 202
+            )
+
+        response = api_client.post(url, {"text": "Ответ"}, format="json")
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == "1"
+
+    def test_answers_for_deleted_question_are_rejected(
+        self, test_question, write_behind
+    ):
+        """Тест отклонения ответов на вопрос, удаленный до записи буфера"""
+        ticket = write_behind.enqueue(test_question.id, uuid.uuid4(), "Ответ")
+        test_question.delete()
+
+        flush_pending(write_behind, batch_size=10, lease=30)
+
+        assert write_behind.status(ticket)["status"] == STATUS_REJECTED
+        assert Answer.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_buffer_recovers_after_crash(tmp_path, test_question):
+    """Тест записи ответов, захваченных процессом, который упал до записи"""
+    path = tmp_path / "buffer.sqlite3"
+    crashed = AnswerBuffer(path, max_pending=10)
+    ticket = crashed.enqueue(test_question.id, uuid.uuid4(), "Ответ до падения")
+    assert len(crashed.claim(limit=10, lease=30)) == 1
+    crashed.close()
+
+    recovered = AnswerBuffer(path, max_pending=10)
+    assert flush_pending(recovered, batch_size=10, lease=30) == 0
+    assert flush_pending(recovered, batch_size=10, lease=0) == 1
+
+    assert recovered.status(ticket)["status"] == STATUS_CREATED
+    assert Answer.objects.filter(text="Ответ до падения").exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_startup_flushes_buffer_without_requests(tmp_path, monkeypatch):
+    """Тест записи ответов, оставшихся в буфере, при старте процесса без запросов"""
+    question = Question.objects.create(text="Вопрос")
+    path = tmp_path / "buffer.sqlite3"
+    crashed = AnswerBuffer(path, max_pending=10)
+    ticket = crashed.enqueue(question.id, uuid.uuid4(), "Ответ до перезапуска")
+    crashed.close()
+    monkeypatch.setattr(ingest, "_buffer", None)
+    monkeypatch.setattr(ingest, "_flusher", None)
+
+    with override_settings(
+        ANSWER_WRITE_BEHIND=True, ANSWER_BUFFER_PATH=path, ANSWER_FLUSH_INTERVAL=0.01
+    ):
+        apps.get_app_config("api").ready()
+        try:
+            deadline = time.monotonic() + 5
+            while not Answer.objects.exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            ingest._flusher.stop()
+            ingest._flusher.join()
+
+    assert Answer.objects.get().text == "Ответ до перезапуска"
+    assert ingest._buffer.status(ticket)["status"] == STATUS_CREATED
+
+
+@override_settings(
+    DATABASE_ROUTERS=["api.db_routers.ReplicaRouter"],
+    DATABASE_REPLICAS={"replica": 1},
+)
+@pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, "replica"])
+def test_flush_checks_questions_on_primary(tmp_path):
+    """Тест записи ответа на вопрос, который еще не попал на реплику"""
+    question = Question.objects.using(DEFAULT_DB_ALIAS).create(text="Новый вопрос")
+    buffer = AnswerBuffer(tmp_path / "buffer.sqlite3", max_pending=10)
+    ticket = buffer.enqueue(question.id, uuid.uuid4(), "Ответ")
+
+    assert flush_pending(buffer, batch_size=10, lease=30) == 1
+
+    assert buffer.status(ticket)["status"] == STATUS_CREATED
+    assert Answer.objects.using(DEFAULT_DB_ALIAS).filter(question=question).exists()
+
+
+def test_buffer_rejects_when_full(tmp_path):
+    """Тест ограничения размера буфера"""
+    buffer = AnswerBuffer(tmp_path / "buffer.sqlite3", max_pending=1)
+    buffer.enqueue(1, uuid.uuid4(), "Ответ")
+
+    with pytest.raises(BufferFull):
+        buffer.enqueue(1, uuid.uuid4(), "Ответ")
@@ -0,0 +1,53 @@
+import asyncio
+
+from benchmarks.loadtest import LoadTest, Scenario, percentile
+
+
+def test_percentile():
+    """Тест расчета перцентилей"""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+def test_load_test_against_local_server(capsys):
+    """Тест прогона сценария против локального HTTP сервера"""
+
+    async def handle(reader, writer):
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                break
+            length = 0
+            for line in head.decode().split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":")[1])
+            await reader.readexactly(length)
+            status = b"409 Conflict" if b"answers/" in head else b"200 OK"
+            writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Length: 2\r\n\r\n{}")
+            await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        scenario = Scenario(
+            name="test",
+            mix={"question-detail": 1, "answer-create": 1},
+            concurrency=[1, 2],
+            duration=0.2,
+        )
+        async with server:
+            return await LoadTest(scenario, f"http://127.0.0.1:{port}").run()
+
+    results = asyncio.run(run())
+
+    assert [result.concurrency for result in results] == [1, 2]
+    for result in results:
+        assert result.requests > 0
+        assert 0 < result.error_rate < 1
+        assert set(result.by_route) == {"question-detail", "answer-create"}
+        assert result.errors == result.by_status[409]
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,37 @@
+import pytest
+from django.urls import reverse
+
+from api import metrics
+
+
+@pytest.fixture
+def fresh_metrics(monkeypatch):
+    """Состояние метрик запуска как у только что запущенного процесса"""
+    monkeypatch.setattr(metrics, "_first_request_at", None)
+    metrics.mark_ready()
+    yield
+    metrics.request_finished.disconnect(dispatch_uid="api.metrics")
+
+
+def test_render_skips_unknown_values(fresh_metrics):
+    """Тест того, что метрики без значения не выводятся"""
+    output = metrics.render()
+
+    assert "# TYPE app_boot_seconds gauge" in output
+    assert "app_time_to_first_request_seconds" not in output
+
+
+@pytest.mark.django_db
+def test_time_to_first_request(client, fresh_metrics):
+    """Тест фиксации времени до первого запроса"""
+    client.get(reverse("api:question-list"))
+    first = metrics.time_to_first_request()
+    client.get(reverse("api:question-list"))
+
+    assert first is not None and first > 0
+    assert metrics.time_to_first_request() == first
+
+    response = client.get(reverse("metrics"))
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert f"app_time_to_first_request_seconds {first}" in response.content.decode()
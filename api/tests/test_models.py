@@ -1,3 +1,4 @@
+import tracemalloc
 import uuid
 from unittest.mock import patch
 
@@ -66,6 +67,56 @@ class TestQuestionModel:
             f"Удаление вопроса: ID {question_id}, текст: {question_text}..."
         )
 
+    def test_question_delete_logs_summary(self, test_question):
+        """Тест итогового лога с числом удаленных ответов"""
+        Answer.objects.create(question=test_question, text="Ответ")
+        question_id = test_question.id
+
+        with patch("api.models.logger.info") as mock_logger:
+            test_question.delete()
+
+        mock_logger.assert_called_once_with(
+            f"Удален вопрос ID {question_id}, удалено ответов: 1"
+        )
+
+    def test_question_delete_returns_counts(self, test_question, settings):
+        """Тест удаления ответов пачками и возвращаемой статистики"""
+        settings.QUESTION_DELETE_CHUNK_SIZE = 2
+        Answer.objects.bulk_create(
+            [Answer(question=test_question, text=f"Ответ {i}") for i in range(5)]
+        )
+
+        deleted = test_question.delete()
+
+        assert deleted == (6, {"api.Answer": 5, "api.Question": 1})
+        assert test_question.pk is None
+        assert Answer.objects.count() == 0
+
+    def test_question_delete_memory_does_not_grow(self, settings):
+        """Тест того, что удаление не загружает ответы в память"""
+        settings.QUESTION_DELETE_CHUNK_SIZE = 100
+
+        def peak_memory(answers_count):
+            question = Question.objects.create(text="Популярный вопрос")
+            Answer.objects.bulk_create(
+                [
+                    Answer(question=question, text="Ответ " * 50)
+                    for _ in range(answers_count)
+                ]
+            )
+            tracemalloc.start()
+            with patch.object(Answer, "from_db") as from_db:
+                question.delete()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            assert from_db.call_count == 0
+            return peak
+
+        small, large = peak_memory(500), peak_memory(4000)
+
+        assert Answer.objects.count() == 0
+        assert large < small * 1.5
+
 
 @pytest.mark.django_db
 class TestAnswerModel:
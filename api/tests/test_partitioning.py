@@ -0,0 +1,90 @@
+from datetime import date
+from importlib import import_module
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+
+from api import partitioning
+
+
+class RecordingCursor:
+    """Курсор, запоминающий запросы и возвращающий заданные результаты"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+
+    def fetchone(self):
+        return (self.results.pop(0),)
+
+
+def test_add_months_across_year():
+    """Тест сдвига месяца через границу года"""
+    assert partitioning.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert partitioning.add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+
+def test_partition_name_roundtrip():
+    """Тест имени секции и обратного разбора месяца"""
+    name = partitioning.partition_name(date(2025, 8, 1))
+    assert name == "api_answer_p2025_08"
+    assert partitioning.partition_month(name) == date(2025, 8, 1)
+    assert partitioning.partition_month("api_answer_unpartitioned") is None
+    assert partitioning.partition_month(partitioning.DEFAULT_PARTITION) is None
+
+
+def test_create_partition_sql_bounds():
+    """Тест границ диапазона секции"""
+    sql = partitioning.create_partition_sql(date(2025, 12, 1))
+    assert "api_answer_p2025_12 PARTITION OF api_answer" in sql
+    assert "FROM ('2025-12-01') TO ('2026-01-01')" in sql
+
+
+def test_create_partition_skips_existing():
+    """Тест того, что существующая секция не создается повторно"""
+    cursor = RecordingCursor(True)
+
+    assert partitioning.create_partition(cursor, date(2025, 8, 1)) == 0
+    assert len(cursor.executed) == 1
+
+
+def test_create_partition_moves_rows_from_default():
+    """Тест переноса ответов месяца из секции по умолчанию в новую секцию"""
+    cursor = RecordingCursor(False, 5)
+
+    assert partitioning.create_partition(cursor, date(2025, 8, 1)) == 5
+    statements = cursor.executed[2:]
+    assert statements[0] == "ALTER TABLE api_answer DETACH PARTITION api_answer_default"
+    assert statements[1] == partitioning.create_partition_sql(date(2025, 8, 1))
+    assert statements[2].startswith("INSERT INTO api_answer_p2025_08 SELECT")
+    assert statements[3].startswith("DELETE FROM api_answer_default")
+    assert statements[4].endswith("ATTACH PARTITION api_answer_default DEFAULT")
+
+
+def test_migration_does_not_convert_table():
+    """Тест того, что схема после миграций не зависит от ANSWER_PARTITIONING"""
+    module = import_module("api.migrations.0002_answer_partitioning")
+
+    assert module.Migration.operations == []
+
+
+@override_settings(ANSWER_PARTITIONING=True)
+def test_partitioning_disabled_on_sqlite():
+    """Тест того, что на SQLite секционирование не применяется"""
+    assert partitioning.is_enabled(connection) is False
+
+
+@pytest.mark.django_db
+def test_command_is_noop_when_disabled(capsys, tmp_path):
+    """Тест команды answer_partitions при выключенном секционировании"""
+    call_command(
+        "answer_partitions", convert=True, archive_older_than=0, archive_dir=tmp_path
+    )
+
+    assert "Секционирование выключено" in capsys.readouterr().out
+    assert list(tmp_path.iterdir()) == []
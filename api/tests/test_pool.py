@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+from collections import Counter
+
+import pytest
+from django.db import connection, connections
+from django.urls import reverse
+
+from api import metrics
+
+
+class StandInPoolTimeout(sqlite3.OperationalError):
+    """Аналог psycopg_pool.PoolTimeout (наследник OperationalError драйвера)"""
+
+
+class StandInPool:
+    """
+    Локальная замена psycopg_pool.ConnectionPool: ограниченное число
+    соединений, ожидание свободного не дольше timeout и get_stats().
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._in_use = 0
+        self._stats = Counter()
+
+    def getconn(self):
+        self._stats["requests_num"] += 1
+        if not self._slots.acquire(timeout=self.timeout):
+            self._stats["requests_errors"] += 1
+            raise StandInPoolTimeout(
+                f"couldn't get a connection after {self.timeout:.2f} sec"
+            )
+        self._in_use += 1
+        return object()
+
+    def putconn(self, conn):
+        self._in_use -= 1
+        self._slots.release()
+
+    def get_stats(self):
+        return {
+            "pool_min": 0,
+            "pool_max": self.max_size,
+            "pool_size": self.max_size,
+            "pool_available": self.max_size - self._in_use,
+            "requests_waiting": 0,
+            **self._stats,
+        }
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Пул из двух соединений, подключенный к соединению Django"""
+    pool = StandInPool(max_size=2, timeout=0.05)
+    backend = type(connections["default"])
+    # как у PostgreSQL: свойство pool, общее для всех потоков
+    monkeypatch.setattr(
+        backend,
+        "pool",
+        property(lambda self: pool if self.alias == "default" else None),
+        raising=False,
+    )
+    monkeypatch.setattr("api.middleware.PoolTimeout", StandInPoolTimeout)
+    ensure_connection = backend.ensure_connection
+
+    def ensure_pooled_connection(self):
+        # как DatabaseWrapper.connect() с пулом: соединение берется из пула,
+        # ошибки драйвера оборачиваются в ошибки Django
+        with self.wrap_database_errors:
+            pool.putconn(pool.getconn())
+        ensure_connection(self)
+
+    monkeypatch.setattr(backend, "ensure_connection", ensure_pooled_connection)
+    return pool
+
+
+@pytest.mark.django_db
+class TestPoolExhaustion:
+    """Тесты поведения при исчерпании пула соединений"""
+
+    def test_request_with_free_connection(self, client, pool):
+        """Тест обычного запроса при свободном соединении"""
+        response = client.get(reverse("api:question-list"))
+
+        assert response.status_code == 200
+
+    def test_exhausted_pool_returns_503(self, client, pool, settings):
+        """Тест ответа 503 с Retry-After, когда все соединения заняты"""
+        held = [pool.getconn() for _ in range(pool.max_size)]
+
+        response = client.get(reverse("api:question-list"))
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == str(settings.DATABASE_POOL_RETRY_AFTER)
+
+        for conn in held:
+            pool.putconn(conn)
+        assert client.get(reverse("api:question-list")).status_code == 200
+
+    def test_other_database_errors_are_not_masked(self, client, pool, monkeypatch):
+        """Тест того, что прочие ошибки базы не превращаются в 503"""
+        monkeypatch.setattr("api.middleware.PoolTimeout", None)
+        pool.getconn(), pool.getconn()
+        client.raise_request_exception = False
+
+        response = client.get(reverse("api:question-list"))
+
+        assert response.status_code == 500
+
+    def test_pool_metrics(self, client, pool):
+        """Тест метрик пула"""
+        held = pool.getconn()
+        client.get(reverse("api:question-list"))
+
+        output = metrics.render()
+
+        assert "# TYPE db_pool_available gauge" in output
+        assert "# TYPE db_pool_timeouts_total counter" in output
+        assert 'db_pool_max_size{alias="default"} 2' in output
+        assert 'db_pool_available{alias="default"} 1' in output
+        assert 'db_pool_requests_total{alias="default"} 2' in output
+        pool.putconn(held)
+
+    def test_pool_metrics_from_other_thread(self, pool):
+        """Тест того, что метрики пула видны из потока без своих подключений"""
+        held = pool.getconn()
+        outputs = []
+        thread = threading.Thread(target=lambda: outputs.append(metrics.render()))
+        thread.start()
+        thread.join()
+
+        assert 'db_pool_available{alias="default"} 1' in outputs[0]
+        pool.putconn(held)
+
+
+def test_pool_metrics_without_pool():
+    """Тест того, что без пула (SQLite) метрики пула не выводятся"""
+    assert not hasattr(connection, "pool")
+
+    assert "db_pool" not in metrics.render()
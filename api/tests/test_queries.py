@@ -0,0 +1,175 @@
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from api.ingest import get_buffer
+from api.models import Answer, Question
+from api.trending import record_answer
+from api.urls import urlpatterns
+
+
+def create_questions(n, answers_per_question=2):
+    """Создает n вопросов, у каждого по answers_per_question ответов"""
+    questions = Question.objects.bulk_create(
+        [Question(text=f"Вопрос {i}") for i in range(n)]
+    )
+    Answer.objects.bulk_create(
+        [
+            Answer(question=question, user_id=uuid.uuid4(), text=f"Ответ {j}")
+            for question in questions
+            for j in range(answers_per_question)
+        ]
+    )
+    return questions
+
+
+def create_question_with_answers(n):
+    """Создает один вопрос с n ответами"""
+    return create_questions(1, answers_per_question=n)[0]
+
+
+def create_trending_questions(n):
+    """Создает n вопросов с ответами, учтенными в рейтинге"""
+    questions = create_questions(n)
+    for answer in Answer.objects.filter(question__in=questions):
+        record_answer(answer)
+    return questions
+
+
+def create_answers(n):
+    """Создает n ответов и возвращает последний"""
+    question = create_question_with_answers(n)
+    return question.answers.last()
+
+
+def create_pending_answer(n):
+    """Создает вопрос с n ответами, принимает в буфер еще один и возвращает ticket"""
+    question = create_question_with_answers(n)
+    return get_buffer().enqueue(question.id, uuid.uuid4(), "Отложенный ответ")
+
+
+def read_answer_stream(client, question):
+    """
+    Читает поток ответов вопроса с Last-Event-ID: 0 до первого keepalive,
+    то есть все ответы, дозагруженные из базы.
+    """
+
+    async def read():
+        url = reverse("api:answer-stream", kwargs={"question_id": question.id})
+        response = await AsyncClient().get(url, headers={"Last-Event-ID": "0"})
+        chunks = []
+        async for chunk in response.streaming_content:
+            if chunk.startswith(b": keepalive"):
+                break
+            chunks.append(chunk)
+        await response.streaming_content.aclose()
+        return response, chunks
+
+    with override_settings(ANSWER_STREAM_KEEPALIVE=0.01):
+        response, chunks = async_to_sync(read)()
+    events = [chunk for chunk in chunks if b"event: answer" in chunk]
+    assert len(events) == question.answers_created
+    return response
+
+
+def create_streamed_question(n):
+    """Создает вопрос с n ответами и запоминает их число для проверки потока"""
+    question = create_question_with_answers(n)
+    question.answers_created = n
+    return question
+
+
+def get_answer_status(client, ticket):
+    with override_settings(ANSWER_WRITE_BEHIND=True):
+        response = client.get(reverse("api:answer-status", kwargs={"ticket": ticket}))
+    assert response.status_code == 200
+    assert response.data["status"] == "pending"
+    return response
+
+
+ROUTE_CASES = {
+    ("question-list", "get"): (
+        create_questions,
+        lambda client, target: client.get(reverse("api:question-list")),
+    ),
+    ("question-list", "post"): (
+        create_questions,
+        lambda client, target: client.post(
+            reverse("api:question-list"), {"text": "Новый вопрос"}, format="json"
+        ),
+    ),
+    ("question-trending", "get"): (
+        create_trending_questions,
+        lambda client, target: client.get(reverse("api:question-trending")),
+    ),
+    ("question-detail", "get"): (
+        create_question_with_answers,
+        lambda client, target: client.get(
+            reverse("api:question-detail", kwargs={"pk": target.id})
+        ),
+    ),
+    ("question-detail", "delete"): (
+        create_question_with_answers,
+        lambda client, target: client.delete(
+            reverse("api:question-detail", kwargs={"pk": target.id})
+        ),
+    ),
+    ("answer-create", "get"): (
+        create_question_with_answers,
+        lambda client, target: client.get(
+            reverse("api:answer-create", kwargs={"question_id": target.id}),
+            {"since_id": 0},
+        ),
+    ),
+    ("answer-create", "post"): (
+        create_question_with_answers,
+        lambda client, target: client.post(
+            reverse("api:answer-create", kwargs={"question_id": target.id}),
+            {"text": "Новый ответ"},
+            format="json",
+        ),
+    ),
+    ("answer-stream", "get"): (create_streamed_question, read_answer_stream),
+    ("answer-detail", "get"): (
+        create_answers,
+        lambda client, target: client.get(
+            reverse("api:answer-detail", kwargs={"pk": target.id})
+        ),
+    ),
+    ("answer-detail", "delete"): (
+        create_answers,
+        lambda client, target: client.delete(
+            reverse("api:answer-detail", kwargs={"pk": target.id})
+        ),
+    ),
+    ("answer-status", "get"): (create_pending_answer, get_answer_status),
+}
+
+
+def test_every_route_is_guarded():
+    """Тест того, что защита от N+1 подключена к каждому маршруту api/urls.py"""
+    guarded = {name for name, _ in ROUTE_CASES}
+    route_names = {pattern.name for pattern in urlpatterns}
+    assert route_names - guarded == set()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "route,method", list(ROUTE_CASES), ids=[f"{r}-{m}" for r, m in ROUTE_CASES]
+)
+def test_query_count_does_not_grow(
+    api_client, assert_queries_do_not_scale, settings, tmp_path, route, method
+):
+    """Тест того, что число запросов не зависит от объема данных"""
+    settings.ANSWER_BUFFER_PATH = tmp_path / "buffer.sqlite3"
+    settings.ANSWER_FLUSH_INTERVAL = 0
+    populate, call = ROUTE_CASES[(route, method)]
+
+    def request(target):
+        response = call(api_client, target)
+        assert response.status_code < 400
+
+    assert_queries_do_not_scale(populate, request)
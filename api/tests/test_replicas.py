@@ -0,0 +1,58 @@
+import pytest
+from django.db import DEFAULT_DB_ALIAS
+from django.test import override_settings
+from django.urls import reverse
+
+from api.db_routers import ReplicaRouter, choose_replica
+from api.middleware import PRIMARY_PIN_COOKIE
+from api.models import Question
+
+replica_settings = override_settings(
+    DATABASE_ROUTERS=["api.db_routers.ReplicaRouter"],
+    DATABASE_REPLICAS={"replica": 1},
+)
+
+
+@override_settings(DATABASE_REPLICAS={"replica": 1, "unused": 0})
+def test_choose_replica_respects_weights():
+    """Тест выбора реплики с учетом весов"""
+    assert {choose_replica() for _ in range(50)} == {"replica"}
+
+
+@override_settings(DATABASE_REPLICAS={})
+def test_router_without_replicas_reads_primary():
+    """Тест чтения из основной базы, если реплики не настроены"""
+    router = ReplicaRouter()
+    assert router.db_for_read(Question) == DEFAULT_DB_ALIAS
+    assert router.db_for_write(Question) == DEFAULT_DB_ALIAS
+    assert router.allow_migrate("replica", "api") is False
+
+
+@replica_settings
+@pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, "replica"])
+def test_get_reads_from_replica(api_client):
+    """Тест того, что GET запросы читают из реплики"""
+    Question.objects.using("replica").create(text="Вопрос на реплике")
+    Question.objects.create(text="Вопрос только на основной базе")
+
+    response = api_client.get(reverse("api:question-list"))
+
+    assert response.status_code == 200
+    assert [item["text"] for item in response.data] == ["Вопрос на реплике"]
+
+
+@replica_settings
+@pytest.mark.django_db(databases=[DEFAULT_DB_ALIAS, "replica"])
+def test_client_reads_own_write_after_post(api_client):
+    """Тест того, что после записи клиент читает из основной базы"""
+    response = api_client.post(
+        reverse("api:question-list"), {"text": "Новый вопрос"}, format="json"
+    )
+    assert response.status_code == 201
+    assert PRIMARY_PIN_COOKIE in response.cookies
+
+    url = reverse("api:question-detail", kwargs={"pk": response.data["id"]})
+    assert api_client.get(url).status_code == 200
+
+    api_client.cookies.clear()
+    assert api_client.get(url).status_code == 404
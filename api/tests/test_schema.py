@@ -0,0 +1,85 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from config.openapi import (SCHEMA_FORMATS, generate_schema, load_schema,
+                            schema_path)
+
+
+@pytest.fixture
+def schema_dir(settings, tmp_path):
+    """Временный каталог схемы со сбросом кэша схемы"""
+    settings.OPENAPI_SCHEMA_DIR = tmp_path
+    load_schema.cache_clear()
+    yield tmp_path
+    load_schema.cache_clear()
+
+
+@pytest.mark.parametrize("fmt", SCHEMA_FORMATS)
+def test_committed_schema_is_up_to_date(fmt):
+    """Тест того, что схема в репозитории соответствует коду"""
+    assert schema_path(fmt).read_bytes() == generate_schema(
+        fmt
+    ), "Схема API устарела, запустите python manage.py generate_schema"
+
+
+def test_generate_schema_check(schema_dir):
+    """Тест проверки устаревшей схемы и ее генерации"""
+    with pytest.raises(CommandError):
+        call_command("generate_schema", "--check")
+
+    call_command("generate_schema")
+    call_command("generate_schema", "--check")
+
+    assert (schema_dir / "openapi.json").read_bytes() == generate_schema("json")
+
+
+@pytest.mark.django_db
+class TestStaticSchemaView:
+    """Тесты отдачи заранее сгенерированной схемы"""
+
+    def test_serves_file_with_cache_headers(self, client, schema_dir, settings):
+        """Тест отдачи файла схемы с ETag и Cache-Control"""
+        (schema_dir / "openapi.json").write_bytes(b'{"swagger": "2.0"}')
+
+        response = client.get(reverse("schema-json", kwargs={"format": ".json"}))
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert response.content == b'{"swagger": "2.0"}'
+        assert response["ETag"]
+        assert (
+            response["Cache-Control"]
+            == f"public, max-age={settings.OPENAPI_SCHEMA_MAX_AGE}"
+        )
+
+    def test_not_modified(self, client, schema_dir):
+        """Тест ответа 304 при совпадающем If-None-Match"""
+        url = reverse("schema-json", kwargs={"format": ".yaml"})
+        etag = client.get(url)["ETag"]
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert not response.content
+
+    def test_generates_schema_without_file(self, client, schema_dir):
+        """Тест генерации схемы при отсутствии файла"""
+        response = client.get(reverse("schema-json", kwargs={"format": ".json"}))
+
+        assert response.content == generate_schema("json")
+
+    def test_unknown_format(self, client, schema_dir):
+        """Тест неизвестного формата схемы"""
+        response = client.get(reverse("schema-json", kwargs={"format": ".xml"}))
+
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("name", ["schema-swagger-ui", "schema-redoc"])
+    def test_ui_pages_load_static_schema(self, client, name):
+        """Тест того, что страницы документации загружают готовую схему"""
+        response = client.get(reverse(name))
+
+        assert response.status_code == 200
+        assert "/swagger.json/" in response.content.decode()
@@ -0,0 +1,53 @@
+import importlib
+
+import pytest
+from django.urls import clear_url_caches
+
+import config.urls
+from benchmarks.startup import packages_time, parse_importtime
+
+REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       300 |        300 |     django.utils.text
+import time:       200 |        500 |   django.utils
+import time:      1000 |       1500 | django
+import time:       700 |        700 | pydantic
+"""
+
+
+def test_parse_importtime():
+    """Тест разбора отчета -X importtime"""
+    imports = parse_importtime(REPORT + "Traceback: не строка отчета\n")
+
+    assert [item.module for item in imports] == [
+        "django.utils.text",
+        "django.utils",
+        "django",
+        "pydantic",
+    ]
+    assert imports[2].cumulative_us == 1500
+    assert packages_time(imports) == {"django": 1.5, "pydantic": 0.7}
+
+
+@pytest.fixture
+def reload_urls():
+    """Перезагрузка корневого URLconf с восстановлением после теста"""
+
+    def reload():
+        clear_url_caches()
+        return importlib.reload(config.urls)
+
+    yield reload
+    reload()
+
+
+@pytest.mark.parametrize(
+    "flag, route", [("ENABLE_ADMIN", "admin/"), ("ENABLE_API_DOCS", "")]
+)
+def test_optional_urlconfs(settings, reload_urls, flag, route):
+    """Тест отключения админки и документации настройками"""
+    assert route in [str(pattern.pattern) for pattern in reload_urls().urlpatterns]
+
+    setattr(settings, flag, False)
+
+    assert route not in [str(p.pattern) for p in reload_urls().urlpatterns]
@@ -0,0 +1,299 @@
+import re
+import time
+import uuid
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from api import trending
+from api.ingest import flush_pending, get_buffer
+from api.models import Answer, Question
+from api.trending import (DELETED_MARGIN, TrendingCounter, get_trending,
+                          read_peers, restore, snapshot_path, top_questions)
+
+NOW = time.time()
+HOUR = 3600
+
+
+def make_counter(size=10):
+    return TrendingCounter(
+        bucket_seconds=60, window=24 * HOUR, half_life=HOUR, size=size
+    )
+
+
+class TestTrendingCounter:
+    """Тесты счетчиков рейтинга"""
+
+    def test_recent_answers_outweigh_old(self):
+        """Тест того, что свежие ответы весят больше старых"""
+        counter = make_counter()
+        for _ in range(3):
+            counter.record(1, NOW - 5 * HOUR)
+        counter.record(2, NOW - 60)
+        counter.record(2, NOW - 30)
+        counter.refresh(NOW)
+
+        top = counter.top(10)
+        assert [item["question_id"] for item in top] == [2, 1]
+        assert [item["answers"] for item in top] == [2, 3]
+        assert top[0]["score"] == pytest.approx(2, rel=0.05)
+        assert top[1]["score"] == pytest.approx(3 / 32, rel=0.05)
+
+    def test_expired_buckets_are_dropped(self):
+        """Тест того, что ответы вне окна не учитываются"""
+        counter = make_counter()
+        counter.record(1, NOW - 25 * HOUR)
+        counter.record(2, NOW)
+        counter.refresh(NOW)
+
+        assert [item["question_id"] for item in counter.top(10)] == [2]
+        assert list(counter._buckets) == [NOW // 60 * 60]
+
+    def test_top_is_limited(self):
+        """Тест того, что рейтинг хранит не больше size вопросов"""
+        counter = make_counter(size=3)
+        for question_id in range(1, 6):
+            for _ in range(question_id):
+                counter.record(question_id, NOW)
+        counter.refresh(NOW)
+
+        assert [item["question_id"] for item in counter.top(10)] == [5, 4, 3]
+        assert [item["question_id"] for item in counter.top(2)] == [5, 4]
+
+    def test_scores_outside_lock(self, monkeypatch):
+        """Тест того, что оценки считаются без блокировки счетчиков"""
+        counter = make_counter()
+        counter.record(1, NOW)
+        score = TrendingCounter._score
+        locked = []
+
+        def checked_score(self, buckets, now):
+            locked.append(self._lock.locked())
+            return score(self, buckets, now)
+
+        monkeypatch.setattr(TrendingCounter, "_score", checked_score)
+        counter.refresh(NOW)
+
+        assert locked == [False]
+        assert counter.top(10)[0]["question_id"] == 1
+
+    def test_refresh_merges_peers(self):
+        """Тест учета счетчиков других процессов при пересчете"""
+        counter = make_counter()
+        counter.record(1, NOW)
+        peer = make_counter()
+        for _ in range(2):
+            peer.record(2, NOW)
+        peer.record(1, NOW)
+        peer.record(3, NOW - 25 * HOUR)
+
+        counter.refresh(NOW, peers=peer._buckets)
+
+        assert [item["question_id"] for item in counter.top(10)] == [1, 2]
+        assert [item["answers"] for item in counter.top(10)] == [2, 2]
+        assert list(counter._buckets) == [NOW // 60 * 60]
+
+    def test_snapshot_roundtrip(self, tmp_path):
+        """Тест сохранения и загрузки снимка счетчиков"""
+        path = tmp_path / "trending.json"
+        counter = make_counter()
+        counter.record(1, NOW)
+        counter.record(1, NOW)
+        counter.record(2, NOW - HOUR)
+        counter.save(path)
+
+        restored = make_counter()
+        restored.load(path)
+        restored.refresh(NOW)
+        counter.refresh(NOW)
+        assert restored.top(10) == counter.top(10)
+
+    def test_save_skips_unchanged(self, tmp_path):
+        """Тест того, что неизмененные счетчики не перезаписываются"""
+        path = tmp_path / "trending.json"
+        counter = make_counter()
+        counter.record(1, NOW)
+        counter.save(path)
+        path.unlink()
+
+        counter.save(path)
+        assert not path.exists()
+
+    def test_load_ignores_broken_snapshot(self, tmp_path):
+        """Тест того, что поврежденный снимок не мешает запуску"""
+        path = tmp_path / "trending.json"
+        path.write_text("{", encoding="utf-8")
+        counter = make_counter()
+        counter.load(path)
+
+        assert counter.top(10) == []
+
+
+@pytest.mark.django_db
+class TestTrendingView:
+    """Тесты эндпоинта рейтинга вопросов"""
+
+    def answer(self, question, count):
+        for _ in range(count):
+            trending.record_answer(
+                Answer.objects.create(
+                    question=question, user_id=uuid.uuid4(), text="Ответ"
+                )
+            )
+
+    def get(self, client, **params):
+        return client.get(reverse("api:question-trending"), params)
+
+    def test_orders_by_answer_velocity(self, api_client):
+        """Тест порядка вопросов в рейтинге"""
+        quiet, busy = Question.objects.bulk_create(
+            [Question(text="Тихий вопрос"), Question(text="Популярный вопрос")]
+        )
+        Question.objects.create(text="Вопрос без ответов")
+        self.answer(quiet, 1)
+        self.answer(busy, 3)
+
+        response = self.get(api_client)
+
+        assert response.status_code == 200
+        questions = response.data["questions"]
+        assert [item["id"] for item in questions] == [busy.id, quiet.id]
+        assert questions[0]["text"] == "Популярный вопрос"
+        assert questions[0]["answers"] == 3
+
+    def test_limit(self, api_client, settings):
+        """Тест ограничения длины рейтинга"""
+        settings.TRENDING_TOP = 2
+        for count in range(1, 4):
+            self.answer(Question.objects.create(text=f"Вопрос {count}"), count)
+
+        assert len(self.get(api_client, limit=1).data["questions"]) == 1
+        assert len(self.get(api_client, limit=50).data["questions"]) == 2
+        assert self.get(api_client, limit="abc").status_code == 400
+        assert self.get(api_client, limit=0).status_code == 400
+
+    def test_excludes_deleted_questions(self, api_client, test_question):
+        """Тест того, что удаленные вопросы не попадают в рейтинг"""
+        deleted = Question.objects.create(text="Удаленный вопрос")
+        self.answer(deleted, 2)
+        self.answer(test_question, 1)
+        deleted.soft_delete()
+
+        response = self.get(api_client)
+
+        assert [item["id"] for item in response.data["questions"]] == [test_question.id]
+
+    def test_many_deleted_questions(self, api_client):
+        """Тест того, что удаленные вопросы не сокращают выдачу"""
+        deleted = Question.objects.bulk_create(
+            [Question(text=f"Удаленный {i}") for i in range(DELETED_MARGIN * 2)]
+        )
+        for question in deleted:
+            self.answer(question, 3)
+        live = Question.objects.bulk_create(
+            [Question(text=f"Вопрос {i}") for i in range(3)]
+        )
+        for question in live:
+            self.answer(question, 1)
+        Question.objects.filter(id__in=[q.id for q in deleted]).update(
+            deleted_at=timezone.now()
+        )
+
+        response = self.get(api_client, limit=3)
+
+        assert sorted(item["id"] for item in response.data["questions"]) == [
+            question.id for question in live
+        ]
+
+    def test_texts_are_loaded_only_for_returned_questions(self, api_client):
+        """Тест того, что тексты загружаются только для запрошенной части рейтинга"""
+        questions = Question.objects.bulk_create(
+            [Question(text=f"Вопрос {i}") for i in range(DELETED_MARGIN + 5)]
+        )
+        for question in questions:
+            self.answer(question, 1)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.get(api_client, limit=2)
+
+        assert len(response.data["questions"]) == 2
+        (query,) = [q["sql"] for q in context.captured_queries if " IN (" in q["sql"]]
+        ids = re.search(r" IN \(([^)]*)\)", query).group(1).split(",")
+        assert len(ids) == 2 + DELETED_MARGIN
+
+    def test_answer_is_recorded_on_commit(
+        self, api_client, test_question, django_capture_on_commit_callbacks
+    ):
+        """Тест того, что созданный через API ответ учитывается в рейтинге"""
+        url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+        with django_capture_on_commit_callbacks(execute=True):
+            api_client.post(url, {"text": "Новый ответ"}, format="json")
+
+        assert top_questions(10)[0]["question_id"] == test_question.id
+
+    def test_flushed_answers_are_recorded(self, test_question, tmp_path):
+        """Тест того, что ответы из буфера учитываются в рейтинге"""
+        with override_settings(
+            ANSWER_WRITE_BEHIND=True,
+            ANSWER_BUFFER_PATH=tmp_path / "buffer.sqlite3",
+            ANSWER_FLUSH_INTERVAL=0,
+        ):
+            buffer = get_buffer()
+            buffer.enqueue(test_question.id, uuid.uuid4(), "Отложенный ответ")
+            flush_pending(buffer, batch_size=10, lease=30)
+
+        assert top_questions(10) == [
+            {
+                "question_id": test_question.id,
+                "score": pytest.approx(1, rel=0.05),
+                "answers": 1,
+            }
+        ]
+
+
+def test_get_trending_loads_snapshot(settings):
+    """Тест того, что счетчики процесса загружаются из снимка"""
+    counter = make_counter()
+    counter.record(7, NOW)
+    counter.save(settings.TRENDING_SNAPSHOT_PATH)
+
+    assert get_trending().top(10)[0]["question_id"] == 7
+
+
+def test_read_peers_skips_own_and_finished_processes(tmp_path, monkeypatch):
+    """Тест того, что учитываются снимки только других работающих процессов"""
+    path = tmp_path / "trending.json"
+    for pid, question_id in ((201, 1), (202, 2), (101, 3)):
+        counter = make_counter()
+        counter.record(question_id, NOW)
+        counter.save(snapshot_path(path, pid))
+    monkeypatch.setattr(trending, "_process_alive", lambda pid: pid in (201, 202))
+
+    peers = read_peers(path, 202, bucket_seconds=60)
+
+    assert peers == {NOW // 60 * 60: {1: 1}}
+
+
+def test_restore_claims_snapshots_of_finished_processes(tmp_path, monkeypatch):
+    """Тест того, что снимок каждого процесса загружает только один процесс"""
+    path = tmp_path / "trending.json"
+    for pid, question_id in ((101, 1), (102, 2), (201, 3)):
+        counter = make_counter()
+        counter.record(question_id, NOW)
+        counter.save(snapshot_path(path, pid))
+    # 101 и 102 завершились, 201 и 202 - работающие процессы
+    monkeypatch.setattr(trending, "_process_alive", lambda pid: pid in (201, 202))
+
+    first, second = make_counter(), make_counter()
+    assert restore(first, path, pid=202) == 2
+    assert restore(second, path, pid=203) == 0
+
+    assert sorted(item["question_id"] for item in first.top(10)) == [1, 2]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "trending.201.json",
+        "trending.202.json",
+    ]
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 import pytest
 from django.urls import reverse
 
@@ -60,6 +62,22 @@ def test_delete_question(api_client, test_question):
     assert Question.objects.filter(id=test_question.id).exists() is False
 
 
+@pytest.mark.django_db
+def test_delete_question_is_soft(api_client, test_answer):
+    """Тест мягкого удаления вопроса: ответы скрыты, строки остаются до очистки"""
+    from api.models import Answer, Question
+
+    question_id = test_answer.question_id
+    url = reverse("api:question-detail", kwargs={"pk": question_id})
+    assert api_client.delete(url).status_code == 204
+
+    assert Question.all_objects.get(id=question_id).deleted_at is not None
+    assert Answer.all_objects.filter(id=test_answer.id).exists()
+    answer_url = reverse("api:answer-detail", kwargs={"pk": test_answer.id})
+    assert api_client.get(answer_url).status_code == 404
+    assert api_client.get(url).status_code == 404
+
+
 @pytest.mark.django_db
 def test_create_answer_valid_data(api_client, test_question):
     """Тест создания ответа с валидными данными"""
@@ -104,3 +122,94 @@ def test_delete_answer(api_client, test_answer):
     from api.models import Answer
 
     assert Answer.objects.filter(id=test_answer.id).exists() is False
+
+
+@pytest.mark.django_db
+def test_get_answers_since_id(api_client, test_question, test_answer):
+    """Тест получения ответов, появившихся после since_id"""
+    from api.models import Answer
+
+    new_answer = Answer.objects.create(question=test_question, text="Новый ответ")
+    url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+    response = api_client.get(url, {"since_id": test_answer.id})
+
+    assert response.status_code == 200
+    assert [answer["id"] for answer in response.data["answers"]] == [new_answer.id]
+    assert response.data["high_water_mark"] == new_answer.id
+    assert response.data["has_more"] is False
+
+
+@pytest.mark.django_db
+def test_get_answers_since_id_not_modified(api_client, test_question, test_answer):
+    """Тест ответа 304, если новых ответов нет и клиент передал тот же ETag"""
+    url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+    etag = f'"{test_question.id}-{test_answer.id}"'
+    response = api_client.get(
+        url, {"since_id": test_answer.id}, HTTP_IF_NONE_MATCH=etag
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response["ETag"] == etag
+
+
+@pytest.mark.django_db
+def test_get_answers_since_id_without_etag(api_client, test_question, test_answer):
+    """Тест пустой дельты, если клиент не передал If-None-Match"""
+    url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+
+    for headers in ({}, {"HTTP_IF_NONE_MATCH": f'"{test_question.id}-0"'}):
+        response = api_client.get(url, {"since_id": test_answer.id}, **headers)
+
+        assert response.status_code == 200
+        assert response.data == {
+            "answers": [],
+            "high_water_mark": test_answer.id,
+            "has_more": False,
+        }
+
+
+@pytest.mark.django_db
+def test_get_answers_delta_is_limited(api_client, test_question, settings):
+    """Тест ограничения размера дельты и флага has_more"""
+    from api.models import Answer
+
+    settings.ANSWER_DELTA_LIMIT = 2
+    answers = [
+        Answer.objects.create(question=test_question, text=f"Ответ {i}")
+        for i in range(3)
+    ]
+    url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+    response = api_client.get(url)
+
+    assert response.data["has_more"] is True
+    assert response.data["high_water_mark"] == answers[1].id
+
+    response = api_client.get(url, {"since_id": response.data["high_water_mark"]})
+    assert [answer["id"] for answer in response.data["answers"]] == [answers[2].id]
+
+
+@pytest.mark.django_db
+def test_get_answers_since_timestamp(api_client, test_question, test_answer):
+    """Тест получения ответов после момента времени"""
+    url = reverse("api:answer-create", kwargs={"question_id": test_question.id})
+    before = test_answer.created_at.replace(microsecond=0) - timedelta(seconds=1)
+
+    response = api_client.get(url, {"since": before.isoformat()})
+    assert [answer["id"] for answer in response.data["answers"]] == [test_answer.id]
+
+    response = api_client.get(url, {"since": "вчера"})
+    assert response.status_code == 400
+
+    response = api_client.get(url, {"since": "2025-13-45T00:00:00"})
+    assert response.status_code == 400
+    assert "since" in response.data
+
+
+@pytest.mark.django_db
+def test_get_answers_for_nonexistent_question(api_client):
+    """Тест получения ответов несуществующего вопроса"""
+    url = reverse("api:answer-create", kwargs={"question_id": 999})
+    response = api_client.get(url, {"since_id": 0})
+
+    assert response.status_code == 404
@@ -0,0 +1,337 @@
+"""
+Рейтинг вопросов по скорости появления ответов (trending).
+
+Каждый созданный ответ увеличивает счетчик своего вопроса в корзине
+длиной TRENDING_BUCKET_SECONDS. Корзины старше окна TRENDING_WINDOW
+отбрасываются, поэтому память пропорциональна числу вопросов, получивших
+ответы в окне. Вес корзины убывает вдвое каждые TRENDING_HALF_LIFE секунд:
+вопрос, на который отвечают сейчас, обходит вопрос, получивший больше
+ответов несколько часов назад.
+
+Раз в TRENDING_REFRESH_INTERVAL секунд фоновый поток пересчитывает оценки
+и выбирает через heapq.nlargest TRENDING_TOP лучших вопросов; запрос
+рейтинга только берет первые k из готового списка.
+
+Счетчики ведутся в памяти процесса: каждый процесс видит ответы, созданные
+им самим (через Answer.save или запись буфера ответов). Поэтому каждый
+процесс периодически сохраняет свои счетчики в отдельный JSON-файл рядом с
+TRENDING_SNAPSHOT_PATH (trending.<pid>.json), а при пересчете добавляет к
+своим счетчикам снимки остальных работающих процессов. Ответы других
+процессов попадают в рейтинг с задержкой до TRENDING_SNAPSHOT_INTERVAL
+секунд. При запуске процесс забирает себе снимки завершившихся процессов:
+файл переименовывается, поэтому его загружает только один процесс и ответы
+не учитываются дважды.
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Сколько вопросов брать из рейтинга сверх запрошенных в первой порции:
+# удаленные вопросы остаются в рейтинге до истечения окна и отбрасываются
+# при выдаче
+DELETED_MARGIN = 10
+
+Buckets = dict[int, Counter]
+
+
+class TrendingCounter:
+    """
+    Счетчики ответов по вопросам в корзинах по времени.
+
+    Attributes:
+        bucket_seconds (int): Длина корзины, с
+        window (int): Учитываемое окно, с
+        half_life (float): Время, за которое вес ответа убывает вдвое, с
+        size (int): Сколько лучших вопросов хранить в рейтинге
+    """
+
+    def __init__(
+        self, bucket_seconds: int, window: int, half_life: float, size: int
+    ) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.window = window
+        self.half_life = half_life
+        self.size = size
+        self._lock = threading.Lock()
+        self._buckets: dict[int, Counter] = {}
+        self._top: list[dict[str, Any]] = []
+        self._changed = False
+
+    def record(self, question_id: int, timestamp: float) -> None:
+        """Учитывает ответ на вопрос, созданный в момент timestamp"""
+        start = int(timestamp // self.bucket_seconds * self.bucket_seconds)
+        with self._lock:
+            self._buckets.setdefault(start, Counter())[question_id] += 1
+            self._changed = True
+
+    def refresh(
+        self, now: Optional[float] = None, peers: Optional[Buckets] = None
+    ) -> None:
+        """
+        Отбрасывает устаревшие корзины и пересчитывает рейтинг.
+
+        peers - корзины других процессов (см. read_peers), которые
+        учитываются вместе со своими. Под блокировкой корзины только
+        копируются, оценки считаются без нее.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for start in [s for s in self._buckets if s <= now - self.window]:
+                del self._buckets[start]
+                self._changed = True
+            buckets = [
+                (start, dict(counter)) for start, counter in self._buckets.items()
+            ]
+        for start, counter in (peers or {}).items():
+            if start > now - self.window:
+                buckets.append((start, counter))
+        self._top = self._score(buckets, now)
+
+    def _score(
+        self, buckets: list[tuple[int, dict[int, int]]], now: float
+    ) -> list[dict[str, Any]]:
+        scores: dict[int, float] = defaultdict(float)
+        counts: Counter = Counter()
+        for start, counter in buckets:
+            age = max(0.0, now - start - self.bucket_seconds / 2)
+            weight = 0.5 ** (age / self.half_life)
+            for question_id, count in counter.items():
+                scores[question_id] += count * weight
+                counts[question_id] += count
+
+        top = heapq.nlargest(self.size, scores.items(), key=itemgetter(1))
+        return [
+            {"question_id": question_id, "score": score, "answers": counts[question_id]}
+            for question_id, score in top
+        ]
+
+    def top(self, limit: int) -> list[dict[str, Any]]:
+        """Первые limit вопросов рейтинга на момент последнего пересчета"""
+        return self._top[:limit]
+
+    def save(self, path: Path) -> None:
+        """Сохраняет счетчики в JSON-файл, если они изменились"""
+        with self._lock:
+            if not self._changed:
+                return
+            snapshot = {
+                "bucket_seconds": self.bucket_seconds,
+                "buckets": {
+                    str(start): dict(counter)
+                    for start, counter in self._buckets.items()
+                },
+            }
+            self._changed = False
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(snapshot), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def load(self, path: Path) -> None:
+        """Загружает счетчики из JSON-файла, сохраненного save()"""
+        buckets = read_snapshot(path, self.bucket_seconds)
+        if not buckets:
+            return
+        with self._lock:
+            for start, counter in buckets.items():
+                self._buckets.setdefault(start, Counter()).update(counter)
+            self._changed = True
+        self.refresh()
+
+
+def read_snapshot(path: Path, bucket_seconds: int) -> Buckets:
+    """Корзины из снимка, сохраненного TrendingCounter.save()"""
+    try:
+        snapshot = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        logger.warning(f"Снимок рейтинга вопросов {path} поврежден")
+        return {}
+    if snapshot.get("bucket_seconds") != bucket_seconds:
+        logger.warning(f"Снимок рейтинга {path} записан с другой длиной корзины")
+        return {}
+    return {
+        int(start): Counter({int(qid): count for qid, count in counter.items()})
+        for start, counter in snapshot["buckets"].items()
+    }
+
+
+class TrendingRefresher(threading.Thread):
+    """
+    Фоновый поток, пересчитывающий рейтинг вместе со снимками других
+    процессов и сохраняющий снимок своего процесса
+    """
+
+    def __init__(self, counter: TrendingCounter, path: Path) -> None:
+        super().__init__(name="trending-refresher", daemon=True)
+        self.counter = counter
+        self.path = path
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        saved_at = time.monotonic()
+        pid = os.getpid()
+        while not self.stopped.wait(settings.TRENDING_REFRESH_INTERVAL):
+            try:
+                peers = read_peers(self.path, pid, self.counter.bucket_seconds)
+                self.counter.refresh(peers=peers)
+                if time.monotonic() - saved_at >= settings.TRENDING_SNAPSHOT_INTERVAL:
+                    self.counter.save(snapshot_path(self.path, pid))
+                    saved_at = time.monotonic()
+            except Exception:
+                logger.exception("Ошибка при пересчете рейтинга вопросов")
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+def snapshot_path(path: Path, pid: int) -> Path:
+    """Файл снимка счетчиков процесса pid"""
+    return path.with_name(f"{path.stem}.{pid}{path.suffix}")
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _owner(candidate: Path, path: Path) -> Optional[int]:
+    """pid процесса, которому принадлежит снимок, или None для чужих файлов"""
+    owner = candidate.name[len(path.stem) + 1 : -len(path.suffix) or None]
+    return int(owner) if owner.isdigit() else None
+
+
+_peer_cache: dict[Path, tuple[int, Buckets]] = {}
+
+
+def read_peers(path: Path, pid: int, bucket_seconds: int) -> Buckets:
+    """
+    Сумма корзин из снимков других работающих процессов.
+
+    Снимки завершившихся процессов не читаются: их забирает себе процесс,
+    запущенный следующим (см. restore). Снимки кешируются по времени
+    изменения файла, поэтому неизменившиеся файлы не разбираются заново.
+    """
+    merged: Buckets = {}
+    seen = set()
+    for candidate in path.parent.glob(f"{path.stem}.*{path.suffix}"):
+        owner = _owner(candidate, path)
+        if owner is None or owner == pid or not _process_alive(owner):
+            continue
+        try:
+            mtime = candidate.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        cached = _peer_cache.get(candidate)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, read_snapshot(candidate, bucket_seconds))
+            _peer_cache[candidate] = cached
+        seen.add(candidate)
+        for start, counter in cached[1].items():
+            merged.setdefault(start, Counter()).update(counter)
+    for stale in _peer_cache.keys() - seen:
+        _peer_cache.pop(stale, None)
+    return merged
+
+
+def restore(counter: TrendingCounter, path: Path, pid: int) -> int:
+    """
+    Загружает в counter снимки завершившихся процессов и свой прежний снимок.
+
+    Снимки живых процессов пропускаются. Каждый снимок перед загрузкой
+    переименовывается, поэтому его забирает только один процесс; загруженные
+    счетчики сразу сохраняются в снимок процесса pid. Старый общий файл
+    TRENDING_SNAPSHOT_PATH загружается так же. Возвращает число снимков.
+    """
+    claimed = []
+    for candidate in [path, *path.parent.glob(f"{path.stem}.*{path.suffix}")]:
+        owner = _owner(candidate, path)
+        if candidate != path and owner is None:
+            continue
+        if candidate != path and owner != pid and _process_alive(owner):
+            continue
+        target = candidate.with_name(f"{candidate.name}.{pid}.claimed")
+        try:
+            os.rename(candidate, target)
+        except FileNotFoundError:
+            continue  # снимок забрал другой процесс
+        counter.load(target)
+        claimed.append(target)
+
+    if claimed:
+        counter.save(snapshot_path(path, pid))
+        for target in claimed:
+            target.unlink()
+        logger.info(f"Загружено снимков рейтинга вопросов: {len(claimed)}")
+    return len(claimed)
+
+
+_trending: Optional[TrendingCounter] = None
+_trending_path: Optional[Path] = None
+_refresher: Optional[TrendingRefresher] = None
+_state_lock = threading.Lock()
+
+
+def get_trending() -> TrendingCounter:
+    """
+    Счетчики рейтинга текущего процесса.
+
+    При первом обращении забирает снимки завершившихся процессов (см.
+    restore) и запускает фоновый пересчет, если TRENDING_REFRESH_INTERVAL
+    больше нуля.
+    """
+    global _trending, _trending_path, _refresher
+    path = Path(settings.TRENDING_SNAPSHOT_PATH)
+    with _state_lock:
+        if _trending is None or _trending_path != path:
+            if _refresher is not None:
+                _refresher.stop()
+                _refresher = None
+            _trending = TrendingCounter(
+                settings.TRENDING_BUCKET_SECONDS,
+                settings.TRENDING_WINDOW,
+                settings.TRENDING_HALF_LIFE,
+                settings.TRENDING_TOP,
+            )
+            restore(_trending, path, os.getpid())
+            _trending_path = path
+        if _refresher is None and settings.TRENDING_REFRESH_INTERVAL > 0:
+            _refresher = TrendingRefresher(_trending, path)
+            _refresher.start()
+        return _trending
+
+
+def record_answer(answer: Any) -> None:
+    """Учитывает созданный ответ в рейтинге вопросов"""
+    get_trending().record(answer.question_id, answer.created_at.timestamp())
+
+
+def top_questions(limit: int) -> list[dict[str, Any]]:
+    """
+    Первые limit вопросов рейтинга.
+
+    Без фонового пересчета (TRENDING_REFRESH_INTERVAL = 0) рейтинг
+    пересчитывается при каждом обращении.
+    """
+    trending = get_trending()
+    if settings.TRENDING_REFRESH_INTERVAL <= 0:
+        path = Path(settings.TRENDING_SNAPSHOT_PATH)
+        trending.refresh(peers=read_peers(path, os.getpid(), trending.bucket_seconds))
+    return trending.top(limit)
@@ -1,18 +1,34 @@
 from django.urls import path
 
 from api.apps import ApiConfig
-from api.views import (AnswerCreateView, AnswerDetailView, QuestionDetailView,
-                       QuestionListView)
+from api.views import (AnswerCreateView, AnswerDetailView, AnswerStatusView,
+                       AnswerStreamView, QuestionDetailView, QuestionListView,
+                       TrendingQuestionsView)
 
 app_name = ApiConfig.name
 
 urlpatterns = [
     path("questions/", QuestionListView.as_view(), name="question-list"),
+    path(
+        "questions/trending/",
+        TrendingQuestionsView.as_view(),
+        name="question-trending",
+    ),
     path("questions/<int:pk>/", QuestionDetailView.as_view(), name="question-detail"),
     path(
         "questions/<int:question_id>/answers/",
         AnswerCreateView.as_view(),
         name="answer-create",
     ),
+    path(
+        "questions/<int:question_id>/answers/stream",
+        AnswerStreamView.as_view(),
+        name="answer-stream",
+    ),
     path("answers/<int:pk>/", AnswerDetailView.as_view(), name="answer-detail"),
+    path(
+        "answers/pending/<uuid:ticket>/",
+        AnswerStatusView.as_view(),
+        name="answer-status",
+    ),
 ]
@@ -1,28 +1,43 @@
+import asyncio
+import json
 import logging
 import uuid
-from typing import Any
+from typing import Any, AsyncIterator, Optional
 
+from django.conf import settings
+from django.db import router
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from django.views import View
 from rest_framework import status
 from rest_framework.generics import (CreateAPIView, ListCreateAPIView,
                                      RetrieveDestroyAPIView)
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from api.dedup import find_duplicates
+from api.events import LAGGED, answer_event, get_broker
+from api.idempotency import IdempotentPostMixin
+from api.ingest import BufferFull, get_buffer
 from api.models import Answer, Question
 from api.serializers import (AnswerCreateSerializer, AnswerSerializer,
                              QuestionSerializer)
+from api.trending import DELETED_MARGIN, top_questions
 
 logger = logging.getLogger(__name__)
 
 
-class QuestionListView(ListCreateAPIView):
+class QuestionListView(IdempotentPostMixin, ListCreateAPIView):
     """
     API endpoint для получения списка вопросов и создания новых вопросов.
 
     Methods:
         GET: Возвращает список всех вопросов с ответами
-        POST: Создает новый вопрос
+        POST: Создает новый вопрос (поддерживает заголовок Idempotency-Key)
     """
 
     queryset = Question.objects.all().prefetch_related("answers")
@@ -34,13 +49,92 @@ class QuestionListView(ListCreateAPIView):
         return super().get(request, *args, **kwargs)
 
     def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        """Обработка POST запроса для создания вопроса"""
+        """
+        Обработка POST запроса для создания вопроса.
+
+        При включенном QUESTION_DEDUP вопрос, почти совпадающий с уже
+        существующими, отклоняется с кодом 409 и списком похожих вопросов.
+        """
         logger.info("Запрос на создание нового вопроса")
         response = super().post(request, *args, **kwargs)
         if response.status_code == status.HTTP_201_CREATED:
             logger.info(f"Вопрос успешно создан: ID {response.data.get('id')}")
         return response
 
+    def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Создание вопроса; дубликаты ищутся только для прошедшего валидацию текста"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if settings.QUESTION_DEDUP:
+            duplicates = find_duplicates(serializer.validated_data["text"])
+            if duplicates:
+                logger.info(f"Отклонен дубликат вопроса ID {duplicates[0]['id']}")
+                return Response(
+                    {
+                        "error": "Похожий вопрос уже существует",
+                        "duplicates": duplicates,
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        return Response(
+            serializer.data, status=status.HTTP_201_CREATED, headers=headers
+        )
+
+
+class TrendingQuestionsView(APIView):
+    """
+    API endpoint для получения вопросов, на которые сейчас активнее всего отвечают.
+
+    Methods:
+        GET: Возвращает рейтинг вопросов по скорости появления ответов
+    """
+
+    def get(self, request: Request) -> Response:
+        """
+        Обработка GET запроса для получения рейтинга вопросов.
+
+        Вопросы упорядочены по убыванию score - числа ответов за последние
+        TRENDING_WINDOW секунд, где вес ответа убывает вдвое каждые
+        TRENDING_HALF_LIFE секунд; answers - число ответов в окне. Параметр
+        limit (по умолчанию 10, не больше TRENDING_TOP) задает длину списка.
+        Рейтинг пересчитывается раз в TRENDING_REFRESH_INTERVAL секунд.
+        """
+        limit = request.query_params.get("limit", "10")
+        if not limit.isdigit() or int(limit) < 1:
+            return Response(
+                {"limit": ["Ожидается целое положительное число"]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = min(int(limit), settings.TRENDING_TOP)
+        logger.info(f"Запрос рейтинга вопросов: limit={limit}")
+
+        # тексты загружаются порциями: удаленные вопросы отбрасываются, и
+        # если их много, следующая порция вдвое больше предыдущей
+        ranking = top_questions(settings.TRENDING_TOP)
+        questions: list[dict[str, Any]] = []
+        start, size = 0, limit + DELETED_MARGIN
+        while len(questions) < limit and start < len(ranking):
+            batch = ranking[start : start + size]
+            texts = dict(
+                Question.objects.filter(
+                    id__in=[item["question_id"] for item in batch]
+                ).values_list("id", "text")
+            )
+            questions.extend(
+                {
+                    "id": item["question_id"],
+                    "text": texts[item["question_id"]],
+                    "score": round(item["score"], 3),
+                    "answers": item["answers"],
+                }
+                for item in batch
+                if item["question_id"] in texts
+            )
+            start, size = start + size, size * 2
+        return Response({"questions": questions[:limit]})
+
 
 class QuestionDetailView(RetrieveDestroyAPIView):
     """
@@ -48,7 +142,8 @@ class QuestionDetailView(RetrieveDestroyAPIView):
 
     Methods:
         GET: Возвращает детальную информацию о вопросе с ответами
-        DELETE: Удаляет вопрос и все связанные ответы
+        DELETE: Помечает вопрос удаленным, вопрос и ответы физически удаляет
+            команда purge_deleted
     """
 
     queryset = Question.objects.all().prefetch_related("answers")
@@ -69,17 +164,100 @@ class QuestionDetailView(RetrieveDestroyAPIView):
             logger.info(f"Вопрос ID {question_id} успешно удален")
         return response
 
+    def perform_destroy(self, instance: Question) -> None:
+        """Мягкое удаление вопроса без каскадного удаления ответов в запросе"""
+        instance.soft_delete()
 
-class AnswerCreateView(CreateAPIView):
+
+class AnswerCreateView(IdempotentPostMixin, CreateAPIView):
     """
-    API endpoint для создания ответов на вопросы.
+    API endpoint для создания ответов на вопросы и получения новых ответов.
 
     Methods:
-        POST: Создает новый ответ для указанного вопроса
+        GET: Возвращает ответы, появившиеся после since_id (или since).
+            Если новых ответов нет и If-None-Match совпадает с ETag,
+            возвращает 304 без тела
+        POST: Создает новый ответ для указанного вопроса (поддерживает
+            заголовок Idempotency-Key). В режиме
+            ANSWER_WRITE_BEHIND ответ ставится в буфер и возвращается 202
+            со ссылкой на статус записи.
     """
 
     serializer_class = AnswerCreateSerializer
 
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """
+        Обработка GET запроса для получения новых ответов (дельты).
+
+        Ответы выбираются по индексу (question_id, id) в порядке возрастания
+        ID, не больше ANSWER_DELTA_LIMIT за запрос. high_water_mark - ID
+        последнего возвращенного ответа: клиент передает его как since_id
+        в следующем запросе. Если has_more истинно, клиенту стоит сразу
+        запросить следующую порцию.
+        """
+        question_id = self.kwargs["question_id"]
+        since_id = request.query_params.get("since_id")
+        since = request.query_params.get("since")
+        logger.info(
+            f"Запрос новых ответов вопроса ID {question_id}: "
+            f"since_id={since_id}, since={since}"
+        )
+
+        queryset = Answer.objects.filter(
+            question_id=question_id, question__deleted_at__isnull=True
+        )
+        high_water_mark = 0
+        if since_id is not None:
+            if not since_id.isdigit():
+                return Response(
+                    {"since_id": ["Ожидается целое неотрицательное число"]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            high_water_mark = int(since_id)
+            queryset = queryset.filter(id__gt=high_water_mark)
+        elif since is not None:
+            try:
+                since_at = parse_datetime(since)
+            except ValueError:  # корректный формат, но несуществующая дата
+                since_at = None
+            if since_at is None:
+                return Response(
+                    {"since": ["Ожидается дата и время в формате ISO 8601"]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            queryset = queryset.filter(created_at__gt=since_at)
+
+        limit = settings.ANSWER_DELTA_LIMIT
+        answers = list(queryset.order_by("id")[: limit + 1])
+        has_more = len(answers) > limit
+        answers = answers[:limit]
+
+        if not answers:
+            if not Question.objects.filter(id=question_id).exists():
+                return Response(
+                    {"error": "Вопрос не найден"}, status=status.HTTP_404_NOT_FOUND
+                )
+        else:
+            high_water_mark = answers[-1].id
+        etag = f'"{question_id}-{high_water_mark}"'
+
+        if not answers and etag in parse_etags(
+            request.headers.get("If-None-Match", "")
+        ):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response["ETag"] = etag
+            return response
+
+        response = Response(
+            {
+                "answers": AnswerSerializer(answers, many=True).data,
+                "high_water_mark": high_water_mark,
+                "has_more": has_more,
+            }
+        )
+        response["ETag"] = etag
+        return response
+
     def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """
         Обработка POST запроса для создания ответа.
@@ -98,8 +276,44 @@ class AnswerCreateView(CreateAPIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+        if settings.ANSWER_WRITE_BEHIND:
+            return self.enqueue(request, question_id)
         return super().post(request, *args, **kwargs)
 
+    def enqueue(self, request: Request, question_id: int) -> Response:
+        """
+        Валидация ответа и постановка его в буфер отложенной записи.
+
+        Если буфер заполнен, возвращает 503 с заголовком Retry-After.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_id = serializer.validated_data.get("user_id", uuid.uuid4())
+
+        try:
+            ticket = get_buffer().enqueue(
+                question_id, user_id, serializer.validated_data["text"]
+            )
+        except BufferFull as e:
+            logger.warning(f"Буфер ответов заполнен: {e}")
+            return Response(
+                {"error": "Сервис перегружен, повторите запрос позже"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(settings.ANSWER_BUFFER_RETRY_AFTER)},
+            )
+
+        status_url = reverse("api:answer-status", kwargs={"ticket": ticket})
+        logger.info(f"Ответ для вопроса ID {question_id} принят в буфер: {ticket}")
+        return Response(
+            {
+                "ticket": ticket,
+                "status": "pending",
+                "status_url": request.build_absolute_uri(status_url),
+            },
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": status_url},
+        )
+
     def perform_create(self, serializer: AnswerCreateSerializer) -> None:
         """
         Создание ответа с привязкой к вопросу.
@@ -123,10 +337,10 @@ class AnswerDetailView(RetrieveDestroyAPIView):
 
     Methods:
         GET: Возвращает детальную информацию об ответе
-        DELETE: Удаляет ответ
+        DELETE: Помечает ответ удаленным
     """
 
-    queryset = Answer.objects.all()
+    queryset = Answer.objects.filter(question__deleted_at__isnull=True)
     serializer_class = AnswerSerializer
 
     def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
@@ -143,3 +357,123 @@ class AnswerDetailView(RetrieveDestroyAPIView):
         if response.status_code == status.HTTP_204_NO_CONTENT:
             logger.info(f"Ответ ID {answer_id} успешно удален")
         return response
+
+    def perform_destroy(self, instance: Answer) -> None:
+        """Мягкое удаление ответа"""
+        instance.soft_delete()
+
+
+class AnswerStatusView(APIView):
+    """
+    API endpoint для получения статуса ответа, принятого в буфер.
+
+    Methods:
+        GET: Возвращает статус записи (pending, created, rejected) и ID ответа
+    """
+
+    def get(self, request: Request, ticket: uuid.UUID) -> Response:
+        """Обработка GET запроса для получения статуса записи ответа"""
+        result = (
+            get_buffer().status(str(ticket)) if settings.ANSWER_WRITE_BEHIND else None
+        )
+        if result is None:
+            return Response(
+                {"error": "Ответ не найден в буфере"}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(result)
+
+
+class AnswerStreamView(View):
+    """
+    Поток новых ответов на вопрос (Server-Sent Events).
+
+    Асинхронное представление для ASGI: соединение не занимает поток воркера.
+    Каждое событие содержит ответ в формате AnswerSerializer, id события -
+    ID ответа. При переподключении клиент передает Last-Event-ID и получает
+    из базы все ответы, созданные после него.
+
+    Methods:
+        GET: Открывает поток событий text/event-stream
+    """
+
+    async def get(self, request: HttpRequest, question_id: int) -> Any:
+        """Обработка GET запроса на подписку на ответы вопроса"""
+        if not await Question.objects.filter(id=question_id).aexists():
+            return JsonResponse(
+                {"error": "Вопрос не найден"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        last_event_id = request.headers.get("Last-Event-ID")
+        last_id = int(last_event_id) if (last_event_id or "").isdigit() else None
+        logger.info(
+            f"Подписка на ответы вопроса ID {question_id}, Last-Event-ID {last_id}"
+        )
+        response = StreamingHttpResponse(
+            self.stream(question_id, last_id), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(
+        self, question_id: int, last_id: Optional[int]
+    ) -> AsyncIterator[str]:
+        """
+        Генератор событий SSE.
+
+        Подписка оформляется до чтения пропущенных ответов из базы, поэтому
+        ответ, созданный между чтением и подпиской, не теряется; дубликаты
+        отбрасываются по ID. Если подписчик не успевает читать события,
+        пропущенное догружается из базы.
+        """
+        broker = get_broker()
+        subscription = broker.subscribe(question_id)
+        try:
+            yield f"retry: {settings.ANSWER_STREAM_RETRY_MS}\n\n"
+            if last_id is not None:
+                async for event in self.replay(question_id, last_id):
+                    last_id = event["id"]
+                    yield self.format_event(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), settings.ANSWER_STREAM_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event is LAGGED:
+                    async for event in self.replay(question_id, last_id or 0):
+                        last_id = event["id"]
+                        yield self.format_event(event)
+                    continue
+                if last_id is not None and event["id"] <= last_id:
+                    continue
+                last_id = event["id"]
+                yield self.format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+            logger.debug(f"Подписка на ответы вопроса ID {question_id} закрыта")
+
+    @staticmethod
+    async def replay(question_id: int, last_id: int) -> AsyncIterator[dict[str, Any]]:
+        """
+        Ответы вопроса с ID больше last_id в порядке создания.
+
+        Читаются из основной базы: тело потока выполняется уже после выхода
+        из PrimaryPinningMiddleware, а отстающая реплика пропустила бы ответы,
+        о которых клиент узнал из событий.
+        """
+        queryset = Answer.objects.using(router.db_for_write(Answer)).filter(
+            question_id=question_id, id__gt=last_id
+        )
+        async for answer in queryset.order_by("id"):
+            yield answer_event(answer)
+
+    @staticmethod
+    def format_event(event: dict[str, Any]) -> str:
+        """Событие в формате text/event-stream"""
+        data = json.dumps(event, ensure_ascii=False)
+        return f"id: {event['id']}\nevent: answer\ndata: {data}\n\n"
@@ -0,0 +1,273 @@
+"""
+Нагрузочное тестирование API по сценариям.
+
+Самодостаточный генератор нагрузки на asyncio (HTTP/1.1 с keep-alive, без
+внешних сервисов). Сценарий - JSON-файл со смесью маршрутов и их весами;
+нагрузка ступенчато наращивается по списку concurrency, для каждой ступени
+выводятся RPS, перцентили задержки и доля ошибок. Ошибкой считается любой
+ответ с кодом вне 2xx, поэтому диапазоны question_ids и answer_ids сценария
+должны соответствовать данным в базе (например, после seed_qa).
+
+Пример:
+    python -m benchmarks.loadtest benchmarks/scenarios/read_heavy.json \\
+        --url http://127.0.0.1:8000 --label asgi-cache-on --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+ROUTES = {
+    "question-list": ("GET", "/api/questions/"),
+    "question-detail": ("GET", "/api/questions/{question_id}/"),
+    "answer-create": ("POST", "/api/questions/{question_id}/answers/"),
+    "answer-detail": ("GET", "/api/answers/{answer_id}/"),
+}
+
+
+@dataclass
+class Scenario:
+    """Описание сценария нагрузки"""
+
+    name: str
+    mix: dict[str, float]
+    concurrency: list[int] = field(default_factory=lambda: [1, 4, 16, 64])
+    duration: float = 10.0
+    question_ids: tuple[int, int] = (1, 1000)
+    answer_ids: tuple[int, int] = (1, 1000)
+
+    @classmethod
+    def load(cls, path: str) -> "Scenario":
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        unknown = set(data["mix"]) - set(ROUTES)
+        if unknown:
+            raise ValueError(f"Неизвестные маршруты в сценарии: {sorted(unknown)}")
+        for key in ("question_ids", "answer_ids"):
+            if key in data:
+                data[key] = tuple(data[key])
+        return cls(**data)
+
+
+@dataclass
+class StepResult:
+    """Результат одной ступени нагрузки"""
+
+    concurrency: int
+    requests: int
+    errors: int
+    rps: float
+    error_rate: float
+    latency_ms: dict[str, float]
+    by_route: dict[str, int]
+    by_status: dict[int, int] = field(default_factory=dict)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль q (0..100) по отсортированному списку методом ближайшего ранга"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Connection:
+    """Постоянное HTTP/1.1 соединение с сервером"""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> int:
+        """Отправляет запрос и возвращает код ответа, тело ответа вычитывается"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Accept: application/json\r\n"
+        )
+        if body:
+            head += (
+                "Content-Type: application/json\r\n" f"Content-Length: {len(body)}\r\n"
+            )
+        self.writer.write(head.encode() + b"\r\n" + body)
+        await self.writer.drain()
+
+        status_line, headers = await self._read_head()
+        status = int(status_line.split()[1])
+        if headers.get("transfer-encoding") == "chunked":
+            await self._read_chunked()
+        else:
+            await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status
+
+    async def _read_head(self) -> tuple[str, dict[str, str]]:
+        raw = await self.reader.readuntil(b"\r\n\r\n")
+        lines = raw.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return lines[0], headers
+
+    async def _read_chunked(self) -> None:
+        while True:
+            size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await self.reader.readexactly(size + 2)
+            if size == 0:
+                return
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+class LoadTest:
+    """Генератор нагрузки для одного сценария"""
+
+    def __init__(self, scenario: Scenario, url: str, seed: int = 0) -> None:
+        parts = urlsplit(url)
+        self.scenario = scenario
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.rng = random.Random(seed)
+        self.routes = list(scenario.mix)
+        self.weights = [scenario.mix[name] for name in self.routes]
+
+    def _next_request(self) -> tuple[str, str, str, bytes]:
+        name = self.rng.choices(self.routes, self.weights)[0]
+        method, template = ROUTES[name]
+        path = template.format(
+            question_id=self.rng.randint(*self.scenario.question_ids),
+            answer_id=self.rng.randint(*self.scenario.answer_ids),
+        )
+        body = b""
+        if method == "POST":
+            body = json.dumps(
+                {"text": f"Ответ нагрузочного теста {self.rng.getrandbits(32)}"}
+            ).encode()
+        return name, method, path, body
+
+    async def _worker(
+        self, deadline: float, latencies: list[float], stats: dict[str, Any]
+    ) -> None:
+        connection = Connection(self.host, self.port)
+        try:
+            while time.perf_counter() < deadline:
+                name, method, path, body = self._next_request()
+                started = time.perf_counter()
+                try:
+                    status = await connection.request(method, path, body)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    status = 0
+                    await connection.close()
+                latencies.append((time.perf_counter() - started) * 1000)
+                stats["by_route"][name] = stats["by_route"].get(name, 0) + 1
+                stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
+                # 0 - ошибка соединения
+                if not 200 <= status < 300:
+                    stats["errors"] += 1
+        finally:
+            await connection.close()
+
+    async def run_step(self, concurrency: int) -> StepResult:
+        """Выполняет одну ступень нагрузки с заданным числом клиентов"""
+        latencies: list[float] = []
+        stats: dict[str, Any] = {"errors": 0, "by_route": {}, "by_status": {}}
+        started = time.perf_counter()
+        deadline = started + self.scenario.duration
+        await asyncio.gather(
+            *(self._worker(deadline, latencies, stats) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        requests = len(latencies)
+        return StepResult(
+            concurrency=concurrency,
+            requests=requests,
+            errors=stats["errors"],
+            rps=requests / elapsed if elapsed else 0.0,
+            error_rate=stats["errors"] / requests if requests else 0.0,
+            latency_ms={
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1] if latencies else 0.0,
+            },
+            by_route=stats["by_route"],
+            by_status=dict(sorted(stats["by_status"].items())),
+        )
+
+    async def run(self) -> list[StepResult]:
+        """Наращивает нагрузку по ступеням сценария"""
+        return [
+            await self.run_step(concurrency)
+            for concurrency in self.scenario.concurrency
+        ]
+
+
+def format_step(result: StepResult) -> str:
+    latency = result.latency_ms
+    return (
+        f"c={result.concurrency:<4} rps={result.rps:9.1f} "
+        f"p50={latency['p50']:7.1f}ms p90={latency['p90']:7.1f}ms "
+        f"p99={latency['p99']:7.1f}ms errors={result.error_rate:6.2%} "
+        f"statuses={result.by_status}"
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenario", help="Путь к JSON-файлу сценария")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, help="Длительность ступени, с")
+    parser.add_argument(
+        "--concurrency", help="Ступени нагрузки через запятую, например 1,8,32"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--label", default="", help="Метка прогона (например wsgi-cache-off)"
+    )
+    parser.add_argument("--output", help="Дописать результаты в JSON Lines файл")
+    args = parser.parse_args(argv)
+
+    scenario = Scenario.load(args.scenario)
+    if args.duration:
+        scenario.duration = args.duration
+    if args.concurrency:
+        scenario.concurrency = [int(value) for value in args.concurrency.split(",")]
+
+    print(f"Сценарий {scenario.name} -> {args.url} {args.label}".rstrip())
+    results = asyncio.run(LoadTest(scenario, args.url, seed=args.seed).run())
+    for result in results:
+        print(format_step(result))
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as file:
+            for result in results:
+                record = {"scenario": scenario.name, "label": args.label}
+                record.update(asdict(result))
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
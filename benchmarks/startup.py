@@ -0,0 +1,152 @@
+"""
+Профиль запуска процесса: время импорта и время до первого запроса.
+
+Загрузка проекта выполняется в отдельных процессах, как при старте
+воркера: WSGI-приложение создается и обрабатывает один запрос. Время
+загрузки и время до первого запроса - медиана нескольких запусков;
+отдельный запуск с -X importtime показывает, какие пакеты и модули
+загружаются дольше всего. Настройки берутся из окружения, например
+ENABLE_ADMIN=False ENABLE_API_DOCS=False для воркера только с API.
+
+Пример:
+    python -m benchmarks.startup --path /api/questions/ --repeat 5 \\
+        --label api-only --output startup.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Код дочернего процесса: BOOT_STARTED фиксируется при импорте пакета config
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+from wsgiref.util import setup_testing_defaults
+from config.wsgi import application
+booted = time.perf_counter()
+environ = {"PATH_INFO": sys.argv[1]}
+setup_testing_defaults(environ)
+statuses = []
+b"".join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+finished = time.perf_counter()
+print(json.dumps({"boot": booted - started, "first_request": finished - started,
+                  "status": statuses[0]}))
+"""
+
+
+@dataclass
+class ImportTime:
+    """Время импорта модуля по отчету -X importtime, мкс"""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class StartupResult:
+    """Результат профилирования запуска"""
+
+    boot_ms: float
+    first_request_ms: float
+    status: str
+    import_ms: float
+    packages_ms: dict[str, float] = field(default_factory=dict)
+    slowest_modules_ms: dict[str, float] = field(default_factory=dict)
+
+
+def parse_importtime(report: str) -> list[ImportTime]:
+    """Разбирает отчет -X importtime (stderr процесса)"""
+    imports = []
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # заголовок отчета
+        imports.append(ImportTime(module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def packages_time(imports: list[ImportTime]) -> dict[str, float]:
+    """Собственное время импорта по пакетам верхнего уровня, мс, по убыванию"""
+    totals: dict[str, int] = defaultdict(int)
+    for item in imports:
+        totals[item.module.split(".")[0]] += item.self_us
+    return {
+        package: us / 1000
+        for package, us in sorted(totals.items(), key=lambda item: -item[1])
+    }
+
+
+def run_child(path: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    flags = ["-X", "importtime"] if importtime else []
+    pythonpath = os.pathsep.join(filter(None, [str(BASE_DIR), os.getenv("PYTHONPATH")]))
+    process = subprocess.run(
+        [sys.executable, *flags, "-c", CHILD, path],
+        cwd=BASE_DIR,
+        env={**os.environ, "PYTHONPATH": pythonpath},
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode:
+        sys.exit(f"Ошибка запуска проекта:\n{process.stderr}")
+    return process
+
+
+def profile(path: str, repeat: int, top: int) -> StartupResult:
+    runs = [json.loads(run_child(path).stdout.splitlines()[-1]) for _ in range(repeat)]
+    imports = parse_importtime(run_child(path, importtime=True).stderr)
+    slowest = sorted(imports, key=lambda item: -item.cumulative_us)[:top]
+    return StartupResult(
+        boot_ms=statistics.median(run["boot"] for run in runs) * 1000,
+        first_request_ms=statistics.median(run["first_request"] for run in runs) * 1000,
+        status=runs[-1]["status"],
+        import_ms=sum(item.self_us for item in imports) / 1000,
+        packages_ms=dict(list(packages_time(imports).items())[:top]),
+        slowest_modules_ms={item.module: item.cumulative_us / 1000 for item in slowest},
+    )
+
+
+def format_result(result: StartupResult) -> str:
+    lines = [
+        f"boot={result.boot_ms:.1f}ms first_request={result.first_request_ms:.1f}ms "
+        f"({result.status}) imports={result.import_ms:.1f}ms",
+        "Пакеты (собственное время импорта):",
+        *(f"  {ms:8.1f}ms  {name}" for name, ms in result.packages_ms.items()),
+        "Модули (суммарное время импорта):",
+        *(f"  {ms:8.1f}ms  {name}" for name, ms in result.slowest_modules_ms.items()),
+    ]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--path", default="/api/questions/", help="Первый запрос")
+    parser.add_argument("--repeat", type=int, default=5, help="Число запусков")
+    parser.add_argument("--top", type=int, default=15, help="Строк в отчете")
+    parser.add_argument("--label", default="", help="Метка прогона (например api-only)")
+    parser.add_argument("--output", help="Дописать результат в JSON Lines файл")
+    args = parser.parse_args(argv)
+
+    result = profile(args.path, args.repeat, args.top)
+    print(format_result(result))
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as file:
+            record = {"label": args.label, **asdict(result)}
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import time
+
+# Момент начала загрузки проекта, от него считается время до первого запроса
+BOOT_STARTED = time.perf_counter()
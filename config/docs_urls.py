@@ -0,0 +1,22 @@
+from django.urls import path
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+from config.openapi import API_INFO, StaticSchemaView, UIOnlyGenerator
+
+schema_view = get_schema_view(
+    API_INFO,
+    public=True,
+    generator_class=UIOnlyGenerator,
+    permission_classes=(permissions.AllowAny,),
+)
+
+urlpatterns = [
+    path("swagger<format>/", StaticSchemaView.as_view(), name="schema-json"),
+    path(
+        "swagger/",
+        schema_view.with_ui("swagger", cache_timeout=0),
+        name="schema-swagger-ui",
+    ),
+    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+]
@@ -0,0 +1,87 @@
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.views import View
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+API_INFO = openapi.Info(
+    title="API Documentation",
+    default_version="v1",
+    description="Документация",
+    terms_of_service="https://www.example.com/policies/terms/",
+    contact=openapi.Contact(email="contact@example.com"),
+    license=openapi.License(name="BSD License"),
+)
+
+SCHEMA_FORMATS = {
+    "json": OpenAPICodecJson(validators=[], pretty=True),
+    "yaml": OpenAPICodecYaml(validators=[]),
+}
+
+
+def generate_schema(fmt: str) -> bytes:
+    """Генерирует схему API в формате fmt ("json" или "yaml") по коду"""
+    schema = OpenAPISchemaGenerator(API_INFO).get_schema(request=None, public=True)
+    return SCHEMA_FORMATS[fmt].encode(schema)
+
+
+def schema_path(fmt: str):
+    return settings.OPENAPI_SCHEMA_DIR / f"openapi.{fmt}"
+
+
+@lru_cache(maxsize=None)
+def load_schema(fmt: str) -> tuple[bytes, str]:
+    """
+    Возвращает схему и ее ETag.
+
+    Схема читается из файла, сгенерированного командой generate_schema,
+    один раз на процесс. Если файла нет, схема генерируется при первом
+    обращении и тоже сохраняется в памяти.
+    """
+    path = schema_path(fmt)
+    content = path.read_bytes() if path.exists() else generate_schema(fmt)
+    return content, f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+class UIOnlyGenerator(OpenAPISchemaGenerator):
+    """
+    Генератор для страниц Swagger UI и ReDoc.
+
+    Страницам нужны только заголовок и версия API, саму схему они
+    загружают по SPEC_URL, поэтому обход представлений не выполняется.
+    """
+
+    def get_schema(self, request=None, public=False):
+        return openapi.Swagger(
+            info=self.info,
+            _prefix="/",
+            _version=self.version,
+            paths=openapi.Paths(paths={}),
+        )
+
+
+class StaticSchemaView(View):
+    """
+    Отдает заранее сгенерированную схему API с ETag и Cache-Control.
+
+    Повторный запрос с совпадающим If-None-Match получает 304 без тела.
+    """
+
+    def get(self, request, format):
+        fmt = format.lstrip(".")
+        if fmt not in SCHEMA_FORMATS:
+            raise Http404
+        content, etag = load_schema(fmt)
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                content, content_type=SCHEMA_FORMATS[fmt].media_type
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = f"public, max-age={settings.OPENAPI_SCHEMA_MAX_AGE}"
+        return response
@@ -2,11 +2,13 @@ import os
 import sys
 from pathlib import Path
 
-from dotenv import load_dotenv
-
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-load_dotenv()
+if (BASE_DIR / ".env").exists():
+    # импорт здесь: без файла .env (переменные задает окружение) модуль не нужен
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / ".env")
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 
@@ -16,15 +18,20 @@ DEBUG = True
 ALLOWED_HOSTS = []
 
 
+# Воркерам, обслуживающим только API, админка и документация не нужны:
+# без них при запуске не импортируются django.contrib.admin и drf-yasg
+ENABLE_ADMIN = os.getenv("ENABLE_ADMIN", "True").lower() == "true"
+ENABLE_API_DOCS = os.getenv("ENABLE_API_DOCS", "True").lower() == "true"
+
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    *(["django.contrib.admin"] if ENABLE_ADMIN else []),
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "rest_framework",
-    "drf_yasg",
+    *(["drf_yasg"] if ENABLE_API_DOCS else []),
     "api",
 ]
 
@@ -36,6 +43,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.PrimaryPinningMiddleware",
+    "api.middleware.PoolTimeoutMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -63,9 +72,16 @@ if "test" in sys.argv or "pytest" in sys.argv[0]:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "test_db.sqlite3",
-        }
+        },
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "test_replica.sqlite3",
+        },
     }
+    DATABASE_REPLICAS = {}
 else:
+    # Пул соединений psycopg 3; без пула соединения живут CONN_MAX_AGE секунд
+    DATABASE_POOL = os.getenv("DATABASE_POOL", "True").lower() == "true"
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.postgresql",
@@ -74,9 +90,115 @@ else:
             "PASSWORD": os.getenv("DATABASE_PASSWORD"),
             "HOST": os.getenv("DATABASE_HOST", "db"),
             "PORT": os.getenv("DATABASE_PORT", "5432"),
+            # пул несовместим с постоянными соединениями Django
+            "CONN_MAX_AGE": (
+                0 if DATABASE_POOL else int(os.getenv("CONN_MAX_AGE", "60"))
+            ),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": (
+                {
+                    "pool": {
+                        "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", "2")),
+                        "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", "10")),
+                        # сколько секунд запрос ждет свободное соединение
+                        "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "5")),
+                        "max_idle": float(os.getenv("DATABASE_POOL_MAX_IDLE", "600")),
+                        "max_lifetime": float(
+                            os.getenv("DATABASE_POOL_MAX_LIFETIME", "3600")
+                        ),
+                    }
+                }
+                if DATABASE_POOL
+                else {}
+            ),
         }
     }
 
+    # Реплики для чтения в формате "host=вес,host=вес", например "replica1=3,replica2=1"
+    DATABASE_REPLICAS = {}
+    for index, item in enumerate(
+        filter(None, os.getenv("DATABASE_REPLICA_HOSTS", "").split(","))
+    ):
+        host, _, weight = item.partition("=")
+        alias = f"replica_{index}"
+        DATABASES[alias] = {
+            **DATABASES["default"],
+            "HOST": host.strip(),
+            "TEST": {"MIRROR": "default"},
+        }
+        DATABASE_REPLICAS[alias] = int(weight or 1)
+
+DATABASE_ROUTERS = ["api.db_routers.ReplicaRouter"] if DATABASE_REPLICAS else []
+
+# Retry-After ответа 503, когда в пуле не нашлось свободного соединения
+DATABASE_POOL_RETRY_AFTER = 1
+
+# Сколько секунд после записи клиент читает из основной базы
+READ_YOUR_WRITES_WINDOW = int(os.getenv("READ_YOUR_WRITES_WINDOW", "5"))
+
+# Помесячное секционирование таблицы ответов (только PostgreSQL)
+ANSWER_PARTITIONING = os.getenv("ANSWER_PARTITIONING", "False").lower() == "true"
+ANSWER_PARTITIONS_AHEAD = int(os.getenv("ANSWER_PARTITIONS_AHEAD", "3"))
+ANSWER_ARCHIVE_DIR = Path(os.getenv("ANSWER_ARCHIVE_DIR", BASE_DIR / "archive"))
+
+# Отложенная запись ответов через локальный буфер (write-behind)
+ANSWER_WRITE_BEHIND = os.getenv("ANSWER_WRITE_BEHIND", "False").lower() == "true"
+ANSWER_BUFFER_PATH = Path(
+    os.getenv("ANSWER_BUFFER_PATH", BASE_DIR / "answer_buffer.sqlite3")
+)
+ANSWER_BUFFER_MAX_PENDING = int(os.getenv("ANSWER_BUFFER_MAX_PENDING", "10000"))
+ANSWER_BUFFER_RETRY_AFTER = 1
+ANSWER_BUFFER_RETENTION = 3600
+ANSWER_FLUSH_INTERVAL = float(os.getenv("ANSWER_FLUSH_INTERVAL", "0.5"))
+ANSWER_FLUSH_BATCH_SIZE = int(os.getenv("ANSWER_FLUSH_BATCH_SIZE", "500"))
+ANSWER_FLUSH_LEASE = 30
+
+# Поток новых ответов (SSE)
+ANSWER_EVENTS_BACKEND = os.getenv("ANSWER_EVENTS_BACKEND", "api.events.InProcessBroker")
+ANSWER_STREAM_KEEPALIVE = 15
+ANSWER_STREAM_RETRY_MS = 3000
+ANSWER_STREAM_QUEUE_SIZE = 100
+
+# Размер пачки ответов при удалении вопроса
+QUESTION_DELETE_CHUNK_SIZE = int(os.getenv("QUESTION_DELETE_CHUNK_SIZE", "5000"))
+
+# Срок хранения ответов для повторов POST с Idempotency-Key, с
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+# Через сколько секунд резерв ключа упавшего запроса перестает блокировать повторы
+IDEMPOTENCY_RESERVATION_TIMEOUT = 60
+
+# Максимум ответов в одном ответе GET /api/questions/<id>/answers/
+ANSWER_DELTA_LIMIT = 100
+
+# Рейтинг вопросов по скорости появления ответов (GET /api/questions/trending/)
+TRENDING_BUCKET_SECONDS = 60
+TRENDING_WINDOW = int(os.getenv("TRENDING_WINDOW", "86400"))
+TRENDING_HALF_LIFE = float(os.getenv("TRENDING_HALF_LIFE", "3600"))
+TRENDING_REFRESH_INTERVAL = float(os.getenv("TRENDING_REFRESH_INTERVAL", "10"))
+TRENDING_TOP = 100
+TRENDING_SNAPSHOT_PATH = Path(
+    os.getenv("TRENDING_SNAPSHOT_PATH") or BASE_DIR / "trending.json"
+)
+TRENDING_SNAPSHOT_INTERVAL = 60
+
+# Отклонение почти одинаковых вопросов по MinHash/LSH-индексу текстов
+QUESTION_DEDUP = os.getenv("QUESTION_DEDUP", "False").lower() == "true"
+QUESTION_DEDUP_THRESHOLD = float(os.getenv("QUESTION_DEDUP_THRESHOLD", "0.85"))
+QUESTION_DEDUP_INDEX_PATH = Path(
+    os.getenv("QUESTION_DEDUP_INDEX_PATH", BASE_DIR / "question_index.bin")
+)
+# Период сохранения индекса фоновым потоком, с; 0 - без фонового потока,
+# индекс строится при первой проверке
+QUESTION_DEDUP_SAVE_INTERVAL = float(os.getenv("QUESTION_DEDUP_SAVE_INTERVAL", "600"))
+
+# Заранее сгенерированная схема API (python manage.py generate_schema)
+OPENAPI_SCHEMA_DIR = BASE_DIR / "config" / "schema"
+OPENAPI_SCHEMA_MAX_AGE = int(os.getenv("OPENAPI_SCHEMA_MAX_AGE", "3600"))
+
+# Страницы документации загружают готовую схему вместо генерации на лету
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {